@@ -22,7 +22,7 @@ Uso:
 import os
 import struct
 import sys
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
 
 # Importar RegistroType
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/..")
@@ -206,6 +206,33 @@ class Heap:
 
         return records
 
+    def scan_range(self, start: int, stop: Optional[int] = None) -> List[List[Any]]:
+        """
+        Lee los registros en las posiciones [start, stop) con una sola lectura
+
+        Args:
+            start: Primera posición
+            stop: Posición final (exclusiva); None para leer hasta el final
+
+        Returns:
+            Lista de registros del rango
+        """
+        num_records = self._read_header()
+        start = max(start, 0)
+        stop = num_records if stop is None else min(stop, num_records)
+        if start >= stop:
+            return []
+
+        with open(self.data_file, "rb") as f:
+            f.seek(HEADER_SIZE + start * self.record_size)
+            data = f.read((stop - start) * self.record_size)
+
+        size = self.record_size
+        return [
+            self.RT.from_bytes(data[i : i + size])
+            for i in range(0, len(data) - size + 1, size)
+        ]
+
     def _select_all(self, include_deleted: bool = False) -> List[List[Any]]:
         """
         Alias de scan_all() para compatibilidad con código legacy.
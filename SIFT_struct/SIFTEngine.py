@@ -105,6 +105,8 @@ class SIFTEngine:
 
         # Estado
         self._vocab_images_count = 0
+        self._next_id = 1
+        self._images_by_id: Dict[int, Dict[str, Any]] = {}
 
         # Inicializar componentes
         self.extractor = SIFTExtractor(
@@ -139,6 +141,13 @@ class SIFTEngine:
         table_format = {"id": "i", "nombre": "100s", "ruta": "200s"}
         self.images_heap = Heap(table_format, "id", self.heap_path, force_create=False)
 
+        # Índice en memoria por ID y siguiente ID libre: un solo recorrido del
+        # Heap al arrancar
+        self._images_by_id = {}
+        for i, r in enumerate(self.images_heap.scan_all()):
+            self._images_by_id.setdefault(r[0], self._index_record(r, i))
+        self._next_id = max(self._images_by_id) + 1 if self._images_by_id else 1
+
         # Cargar estado persistido
         self._load_state()
 
@@ -232,6 +241,13 @@ class SIFTEngine:
             "ruta": decode(record[2]),
         }
 
+    def _index_record(self, record: list, position: int) -> Dict[str, Any]:
+        """Registro del índice en memoria, con la ruta absoluta ya resuelta."""
+        info = self._record_to_dict(record)
+        info["position"] = position
+        info["abs_path"] = os.path.abspath(os.path.join(self.base_dir, info["ruta"]))
+        return info
+
     def _clear_all(self):
         """Limpia todos los datos."""
         files = [
@@ -289,6 +305,10 @@ class SIFTEngine:
             # Insertar en Heap
             record = [image_id, image_name, image_path]
             position = self.images_heap.insert(record)
+            self._next_id = max(self._next_id, image_id + 1)
+            self._images_by_id.setdefault(
+                image_id, self._index_record(record, position)
+            )
 
             # Guardar descriptores
             self._save_descriptors(base_name, descriptors)
@@ -349,54 +369,84 @@ class SIFTEngine:
                 f"Vocabulario no disponible. Mínimo {self.config.min_images_for_vocab} imágenes."
             )
 
-        # Crear imagen temporal procesada
-        temp_path = os.path.join(self.img_dir, "__query_temp__.jpg")
-
-        if not self.extractor.resize_image(query_path, temp_path):
-            raise ValueError("Error procesando imagen de consulta")
-
-        try:
-            # Extraer descriptores
-            descriptors = self.extractor.extract(temp_path)
-            if descriptors is None:
-                raise ValueError("No se pudieron extraer características")
-
-            # Calcular histograma y TF-IDF
-            histogram = self.codebook.compute_histogram(descriptors)
-            query_tfidf = self.tfidf.compute_tfidf(histogram)
-
-            # Decidir método de búsqueda
-            use_inv = (
-                use_inverted
-                if use_inverted is not None
-                else self.config.use_inverted_index
-            )
+        # El archivo temporal es compartido y add_image modifica los índices:
+        # la búsqueda se serializa con el mismo lock
+        with self._lock:
+            # Crear imagen temporal procesada
+            temp_path = os.path.join(self.img_dir, "__query_temp__.jpg")
 
-            if use_inv and self.inverted_index is not None:
-                raw_results = self.inverted_index.search(query_tfidf, k)
-                results = [
-                    (doc_id, sim, self._get_image_info(doc_id) or {})
-                    for doc_id, sim in raw_results
-                ]
-            elif self.knn_sequential is not None:
-                raw_results = self.knn_sequential.search_with_metadata(query_tfidf, k)
-                results = [(idx, sim, meta) for idx, sim, meta in raw_results]
-            else:
-                raise ValueError("No hay índice de búsqueda disponible")
+            if not self.extractor.resize_image(query_path, temp_path):
+                raise ValueError("Error procesando imagen de consulta")
 
-            return results
+            try:
+                # Extraer descriptores
+                descriptors = self.extractor.extract(temp_path)
+                if descriptors is None:
+                    raise ValueError("No se pudieron extraer características")
+
+                # Calcular histograma y TF-IDF
+                histogram = self.codebook.compute_histogram(descriptors)
+                query_tfidf = self.tfidf.compute_tfidf(histogram)
+
+                # Decidir método de búsqueda
+                use_inv = (
+                    use_inverted
+                    if use_inverted is not None
+                    else self.config.use_inverted_index
+                )
+
+                if use_inv and self.inverted_index is not None:
+                    raw_results = self.inverted_index.search(query_tfidf, k)
+                    results = [
+                        (doc_id, sim, self._get_image_info(doc_id) or {})
+                        for doc_id, sim in raw_results
+                    ]
+                elif self.knn_sequential is not None:
+                    raw_results = self.knn_sequential.search_with_metadata(query_tfidf, k)
+                    results = [(idx, sim, meta) for idx, sim, meta in raw_results]
+                else:
+                    raise ValueError("No hay índice de búsqueda disponible")
+
+                return results
+
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def get_image(self, image_id: int) -> Optional[Dict[str, Any]]:
+        """Obtiene una imagen por ID en O(1), o None si no existe."""
+        return self._images_by_id.get(image_id)
+
+    def indexed_images(self) -> List[Dict[str, Any]]:
+        """Registros del índice en memoria (incluyen ``abs_path``), sin leer el Heap."""
+        return list(self._images_by_id.values())
+
+    def next_id(self) -> int:
+        """Reserva y retorna el siguiente ID de imagen (O(1))."""
+        with self._lock:
+            value = self._next_id
+            self._next_id += 1
+            return value
 
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+    def get_all_images(
+        self, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Obtiene las imágenes indexadas, opcionalmente paginadas.
 
-    def get_all_images(self) -> List[Dict[str, Any]]:
-        """Obtiene todas las imágenes indexadas."""
-        records = self.images_heap.scan_all()
+        La página se lee directamente del Heap (posiciones [offset, offset+limit)).
+        """
+        offset = max(offset, 0)
+        stop = None if limit is None else offset + limit
+        records = self.images_heap.scan_range(offset, stop)
         return [
-            {**self._record_to_dict(r), "position": i} for i, r in enumerate(records)
+            {**self._record_to_dict(r), "position": offset + i}
+            for i, r in enumerate(records)
         ]
 
+    def count_images(self) -> int:
+        """Número de imágenes en el Heap (solo lee la cabecera)."""
+        return self.images_heap.count()
+
     def get_stats(self) -> Dict[str, Any]:
         """Obtiene estadísticas del índice."""
         num_images = self.images_heap.count()
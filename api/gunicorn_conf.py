@@ -0,0 +1,37 @@
+"""
+Configuración de Gunicorn para producción
+
+    cd api && gunicorn -c gunicorn_conf.py main:app
+
+Requiere ``pip install gunicorn``. Por defecto usa un solo worker, igual que
+``main.py`` y ``start.py``: el catálogo SQL, las cachés y descriptores del
+B+ Tree y el lock de SQL viven en cada proceso, así que con varios workers un
+CREATE no se ve en los demás y escrituras concurrentes pueden corromper los
+índices. ``WORKERS=N`` (uno por núcleo, p. ej.) es opcional y solo es seguro
+para cargas de solo lectura/búsqueda.
+"""
+
+import os
+import sys
+
+from uvicorn.workers import UvicornWorker
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WORKERS", "1"))
+worker_class = "gunicorn_conf.FastUvicornWorker"
+# UvicornWorker no lee worker_connections: el límite se pasa en CONFIG_KWARGS
+worker_connections = int(os.getenv("LIMIT_CONCURRENCY", "1000"))
+backlog = 2048
+# Extracción SIFT y cargas CSV grandes pueden tardar
+timeout = 120
+keepalive = 5
+
+
+class FastUvicornWorker(UvicornWorker):
+    """Worker de Uvicorn con uvloop/httptools y límite de concurrencia."""
+
+    CONFIG_KWARGS = {
+        "loop": "auto" if sys.platform == "win32" else "uvloop",
+        "http": "auto" if sys.platform == "win32" else "httptools",
+        "limit_concurrency": worker_connections,
+    }
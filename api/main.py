@@ -6,23 +6,58 @@ API REST que expone las funcionalidades del parser SQL
 para ser consumidas desde el frontend.
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, FastAPI, HTTPException, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.routing import Match
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from functools import lru_cache
+from collections import OrderedDict
 import sys
 import os
 import time
 import csv
+import json
 import io
 import shutil
+import uuid
 import pickle
+import threading
+import codecs
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import hashlib
+import orjson
+import asyncio
+import anyio
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from pathlib import Path
+from email.utils import formatdate
+
+# Directorio de la API y raíz del proyecto, calculados una sola vez
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BASE_DIR)
+DIST_DIR = os.path.join(BASE_DIR, "static", "dist")
 
 # Agregar el parser al path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_DIR)
+
+# Logging no bloqueante: las peticiones solo encolan el registro y un hilo de
+# fondo (QueueListener) lo escribe. Nivel WARNING salvo LOG_LEVEL=DEBUG/INFO
+log = logging.getLogger("api")
+log.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+log.propagate = False
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
 
 try:
     from parser import create_sql_parser_engine
@@ -30,9 +65,9 @@ try:
     from SIFT_struct.SIFTEngine import SIFTEngine, SIFTConfig
     from Audio_struct.AudioEngine import AudioEngine, AudioConfig
     from Heap_struct.Heap import Heap
-    from inverted_index.indexer import SPIMIIndexer
+    from inverted_index.indexer import SPIMIIndexer, read_doc_norms_count
     from inverted_index.query_engine import QueryEngine
-    from inverted_index.preprocessing import TextPreprocessor
+    from inverted_index.preprocessing import TextPreprocessor, tokenize_bytes
 except ImportError as e:
     print(f"Error importando parser: {e}")
     raise
@@ -44,6 +79,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # Configurar CORS para permitir requests desde el frontend
@@ -55,6 +91,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class MediaAwareGZipMiddleware(GZipMiddleware):
+    """GZip para las respuestas JSON grandes, salvo los archivos multimedia:
+    ya vienen comprimidos y sus respuestas usan rangos/pathsend."""
+
+    EXCLUDED_PREFIXES = ("/api/sift/image-file/", "/api/audio/file/")
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] == "http" and path.startswith(self.EXCLUDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(MediaAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Todas las rutas de la API cuelgan de un único prefijo /api
+api_router = APIRouter(prefix="/api")
+
 # Crear adaptador unificado de base de datos
 # Soporta Sequential, B+Tree, ISAM, Hash y R-Tree
 database_adapter = UnifiedDatabaseAdapter(data_dir="data")
@@ -62,6 +118,10 @@ database_adapter = UnifiedDatabaseAdapter(data_dir="data")
 # Motor del parser SQL global con todas las estructuras
 sql_engine = create_sql_parser_engine(database_adapter=database_adapter)
 
+# Los endpoints SQL son síncronos (corren en el threadpool) y el motor no es
+# thread-safe: todo acceso a sql_engine/database_adapter pasa por este lock
+_sql_lock = threading.Lock()
+
 # Gestor de imágenes SIFT
 sift_image_manager = None  # Se inicializará cuando se cree una tabla de imágenes
 
@@ -69,18 +129,33 @@ sift_image_manager = None  # Se inicializará cuando se cree una tabla de imáge
 bow_indexer = None  # SPIMIIndexer para crear índices
 bow_query_engine = None  # QueryEngine para búsquedas
 bow_preprocessor = TextPreprocessor(language="spanish")
-BOW_DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "bow")
+BOW_DATA_DIR = os.path.join(BASE_DIR, "data", "bow")
 os.makedirs(BOW_DATA_DIR, exist_ok=True)
+# Las colecciones eliminadas se renombran con este sufijo y se borran en segundo plano
+BOW_TRASH_MARKER = ".deleted-"
+_background_tasks = set()  # referencias a las tareas en segundo plano en curso
+
+
+def _in_background(func, *args) -> None:
+    """Ejecuta ``func(*args)`` en el threadpool sin que la petición lo espere"""
+    task = asyncio.create_task(run_in_threadpool(func, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _remove_in_background(path: str) -> None:
+    """Borra un directorio en el threadpool sin que la petición lo espere"""
+    _in_background(shutil.rmtree, path, True)
 
 # Gestor de Audio (MFCC)
 audio_manager = None
 
 # Directorio para almacenar imágenes subidas
-IMAGES_DIR = os.path.join(os.path.dirname(__file__), "data", "sift", "uploaded_images")
+IMAGES_DIR = os.path.join(BASE_DIR, "data", "sift", "uploaded_images")
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
 # Directorio para almacenar audios subidos
-AUDIOS_DIR = os.path.join(os.path.dirname(__file__), "data", "audio", "uploaded_audios")
+AUDIOS_DIR = os.path.join(BASE_DIR, "data", "audio", "uploaded_audios")
 os.makedirs(AUDIOS_DIR, exist_ok=True)
 
 
@@ -88,6 +163,8 @@ os.makedirs(AUDIOS_DIR, exist_ok=True)
 class SQLQuery(BaseModel):
     sql: str
     should_validate: bool = True
+    # El AST completo está en /api/explain; aquí solo si se pide
+    include_parsed: bool = False
 
 
 class SQLResponse(BaseModel):
@@ -111,32 +188,435 @@ class ServerStatus(BaseModel):
     uptime_seconds: float
 
 
+# index.html del build de React, leído una sola vez al importar el módulo
+DIST_INDEX = os.path.join(DIST_DIR, "index.html")
+INDEX_HTML_BYTES: Optional[bytes] = None
+if os.path.exists(DIST_INDEX):
+    with open(DIST_INDEX, "rb") as _f:
+        INDEX_HTML_BYTES = _f.read()
+
+
+def _allowed_methods(scope) -> set:
+    """Métodos de las rutas de la app que coinciden con el path de ``scope``"""
+    allowed = set()
+    for route in scope["app"].routes:
+        methods = getattr(route, "methods", None)
+        if methods and route.matches(scope)[0] != Match.NONE:
+            allowed |= methods
+    return allowed
+
+
+class SPAStaticFiles(StaticFiles):
+    """StaticFiles que devuelve index.html para las rutas de React Router.
+
+    index.html se sirve desde memoria (INDEX_HTML_BYTES), sin stat ni open por
+    petición; el resto de archivos del build pasan por StaticFiles.
+    """
+
+    def _index_response(self) -> Response:
+        return Response(content=INDEX_HTML_BYTES, media_type="text/html")
+
+    async def get_response(self, path: str, scope):
+        # Un /api/... que ninguna ruta resolvió no es una ruta de React. El
+        # montaje en "/" le gana al 405 del router, así que se responde aquí:
+        # 405 si la ruta existe con otro método, si no 404 JSON
+        if path == "api" or path.startswith("api/"):
+            allowed = _allowed_methods(scope)
+            if allowed:
+                raise StarletteHTTPException(
+                    status_code=405, headers={"Allow": ", ".join(sorted(allowed))}
+                )
+            raise StarletteHTTPException(status_code=404)
+        if INDEX_HTML_BYTES is not None and path in (".", "index.html"):
+            return self._index_response()
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404:
+                raise
+            if INDEX_HTML_BYTES is not None:
+                return self._index_response()
+            return await super().get_response("index.html", scope)
+
+
+# Cuerpo 404 genérico serializado una sola vez
+ERR_404_BYTES = json.dumps(
+    {"error": "Endpoint no encontrado", "detail": ""}, separators=(",", ":")
+).encode()
+
+# Imágenes menores a THUMB_MAX_BYTES se sirven desde memoria, hasta un total
+# de THUMB_CACHE_BUDGET bytes
+THUMB_MAX_BYTES = 64 * 1024
+THUMB_CACHE_BUDGET = 32 * 1024 * 1024
+
+# Cabeceras fijas de las respuestas de imagen (Starlette copia el dict)
+IMAGE_HEADERS = {"Cache-Control": "public, max-age=3600", "Accept-Ranges": "bytes"}
+
+
+class _FdCache:
+    """LRU acotado de descriptores abiertos: image_id -> fd.
+
+    Evita un open(2) por petición en la galería. Un descriptor desalojado
+    mientras se está enviando se cierra recién cuando ese envío termina.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._entries: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+        self._uses: Dict[int, int] = {}
+        self._retired = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, image_id: int, path: str, mtime_ns: int) -> int:
+        with self._lock:
+            entry = self._entries.get(image_id)
+            if entry is not None and entry[1] == mtime_ns:
+                self._entries.move_to_end(image_id)
+                self._uses[entry[0]] = self._uses.get(entry[0], 0) + 1
+                return entry[0]
+
+        fd = os.open(path, os.O_RDONLY)
+        with self._lock:
+            old = self._entries.pop(image_id, None)
+            if old is not None:
+                self._retire(old[0])
+            self._entries[image_id] = (fd, mtime_ns)
+            self._uses[fd] = self._uses.get(fd, 0) + 1
+            while len(self._entries) > self.capacity:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._retire(evicted)
+        return fd
+
+    def release(self, fd: int):
+        with self._lock:
+            self._uses[fd] -= 1
+            if self._uses[fd] == 0:
+                del self._uses[fd]
+                if fd in self._retired:
+                    self._retired.discard(fd)
+                    os.close(fd)
+
+    def clear(self):
+        with self._lock:
+            while self._entries:
+                _, (fd, _) = self._entries.popitem()
+                self._retire(fd)
+
+    def _retire(self, fd: int):
+        if self._uses.get(fd, 0) == 0:
+            os.close(fd)
+        else:
+            self._retired.add(fd)
+
+
+_fd_cache = _FdCache()
+
+
+class ImageFileResponse(FileResponse):
+    """FileResponse que envía el archivo en bloques de 1 MiB.
+
+    Starlette lee de a 64 KiB, lo que en JPEGs de varios MB implica muchas
+    vueltas del event loop cuando el servidor no ofrece envío zero-copy.
+    Lee con pread sobre el descriptor cacheado en ``_fd_cache``, por lo que
+    requiere ``stat_result``. Con ``byte_range=(inicio, fin)`` responde 206
+    enviando solo ese tramo (ambos extremos inclusive).
+    """
+
+    chunk_size = 1 << 20
+
+    def __init__(
+        self,
+        image_id: int,
+        *args,
+        byte_range: Optional[Tuple[int, int]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.image_id = image_id
+        size = self.stat_result.st_size
+        self.start, self.end = byte_range or (0, size - 1)
+        if byte_range is not None:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+            self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope, receive, send):
+        # Granian/Hypercorn envían el archivo completo con sendfile(2) si se
+        # les pasa la ruta; Starlette 0.27 todavía no usa esta extensión
+        full_body = self.status_code == 200 and not self.send_header_only
+        if full_body and "http.response.pathsend" in scope.get("extensions", {}):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send({"type": "http.response.pathsend", "path": self.path})
+            if self.background is not None:
+                await self.background()
+            return
+
+        fd = await anyio.to_thread.run_sync(
+            _fd_cache.acquire, self.image_id, self.path, self.stat_result.st_mtime_ns
+        )
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if self.send_header_only:
+                await send({"type": "http.response.body", "body": b""})
+            else:
+                offset, stop = self.start, self.end + 1
+                more_body = True
+                while more_body:
+                    chunk = await anyio.to_thread.run_sync(
+                        os.pread, fd, min(self.chunk_size, stop - offset), offset
+                    )
+                    offset += len(chunk)
+                    more_body = bool(chunk) and offset < stop
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": more_body,
+                        }
+                    )
+        finally:
+            _fd_cache.release(fd)
+        if self.background is not None:
+            await self.background()
+
+
+def _warm_image(path: str, size: int) -> Optional[bytes]:
+    """Precarga una imagen: las miniaturas se leen a memoria y al resto se le
+    pide al kernel que las traiga al page cache (POSIX_FADV_WILLNEED)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        if size < THUMB_MAX_BYTES:
+            return os.pread(fd, size, 0)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return None
+    finally:
+        os.close(fd)
+
+
+# (ruta absoluta, etag, stat, cabeceras)
+_ImageEntry = Tuple[str, str, os.stat_result, Dict[str, str]]
+
+# Índice vigente (None hasta construirlo o tras invalidarlo) y las miniaturas
+# precargadas para ese índice: image_id -> bytes
+_image_index_state: Optional[Dict[int, _ImageEntry]] = None
+_image_thumbs: Dict[int, bytes] = {}
+# Un ID desconocido reconstruye el índice como mucho una vez por intervalo
+# (segundos); las cargas por la API lo invalidan explícitamente
+IMAGE_INDEX_REBUILD_INTERVAL = 30.0
+_image_index_built_at = float("-inf")
+
+
+def _build_image_index() -> Dict[int, _ImageEntry]:
+    """Mapa image_id -> (ruta absoluta, etag, stat, cabeceras).
+
+    Los archivos indexados no cambian tras la carga, así que el stat se hace
+    aquí y no en cada petición. Hace un stat por imagen: se llama en el
+    threadpool (ver ``_get_image_index``).
+    """
+    index = {}
+    # El motor ya guarda la ruta absoluta de cada imagen en su índice por ID
+    for img in sift_image_manager.indexed_images():
+        path = img["abs_path"]
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        etag = f'W/"{st.st_size:x}-{int(st.st_mtime):x}"'
+        headers = {
+            **IMAGE_HEADERS,
+            "ETag": etag,
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        }
+        index[img["id"]] = (path, etag, st, headers)
+    return index
+
+
+def _preload_images(index: Dict[int, _ImageEntry]) -> None:
+    """Precarga las imágenes de ``index`` (ver ``_warm_image``); corre en el
+    threadpool. Las miniaturas se publican solo si el índice sigue vigente."""
+    global _image_thumbs
+    thumbs = {}
+    thumbs_budget = THUMB_CACHE_BUDGET
+    for image_id, (path, _, st, _) in index.items():
+        if st.st_size <= thumbs_budget:
+            thumb = _warm_image(path, st.st_size)
+            if thumb is not None:
+                thumbs[image_id] = thumb
+                thumbs_budget -= len(thumb)
+    if _image_index_state is index:
+        _image_thumbs = thumbs
+
+
+async def _get_image_index(rebuild: bool = False) -> Dict[int, _ImageEntry]:
+    """Índice de imágenes; la primera vez (o con ``rebuild``) se construye en
+    el threadpool y la precarga queda en segundo plano. Como el motor SIFT se
+    crea de forma perezosa, no puede hacerse al arrancar.
+    Se invalida con ``_invalidate_image_cache()`` al modificar las imágenes.
+    """
+    global _image_index_state, _image_index_built_at
+    index = _image_index_state
+    if index is None or rebuild:
+        # Se marca antes de esperar: misses concurrentes no reconstruyen de nuevo
+        _image_index_built_at = time.monotonic()
+        index = await anyio.to_thread.run_sync(_build_image_index)
+        _image_index_state = index
+        _in_background(_preload_images, index)
+    return index
+
+
+def _invalidate_image_cache():
+    """Descarta el índice de imágenes, las miniaturas y los descriptores"""
+    global _image_index_state, _image_thumbs
+    _image_index_state = None
+    _image_thumbs = {}
+    _fd_cache.clear()
+
+
+UPLOAD_COPY_CHUNK = 1 << 20
+
+
+def _save_upload(src, dest_path: str) -> None:
+    """Copia un UploadFile a disco.
+
+    Si el SpooledTemporaryFile ya pasó a disco se usa os.sendfile (copia en
+    el kernel); si sigue en memoria, o sendfile no está disponible, se copia
+    en bloques de 1 MiB.
+    """
+    with open(dest_path, "wb") as dst:
+        if getattr(src, "_rolled", True) and hasattr(os, "sendfile"):
+            try:
+                offset = src.tell()
+                remaining = os.fstat(src.fileno()).st_size - offset
+                while remaining > 0:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                src.seek(offset)
+                return
+            except (OSError, AttributeError, io.UnsupportedOperation):
+                dst.seek(0)
+                dst.truncate()
+        shutil.copyfileobj(src, dst, UPLOAD_COPY_CHUNK)
+
+
+async def _path_exists(path: str) -> bool:
+    """os.path.exists ejecutado en el threadpool para no bloquear el event loop"""
+    return await anyio.to_thread.run_sync(os.path.exists, path)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica si la cabecera If-None-Match del cliente cubre el ETag dado"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Interpreta un único rango ``bytes=a-b``, ``bytes=a-`` o ``bytes=-n``.
+
+    Devuelve None si la cabecera no aplica (se envía el archivo completo) y
+    lanza ValueError si el rango no es satisfacible.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not first.isdigit() and not last.isdigit():
+        return None
+    if first.isdigit():
+        start = int(first)
+        end = min(int(last), size - 1) if last.isdigit() else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise ValueError(range_header)
+    return start, end
+
+
+def _json_bytes_response(request: Request, body: bytes, etag: str) -> Response:
+    """Respuesta JSON ya serializada, con 304 si el cliente tiene ese ETag"""
+    headers = {"ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _orjson_response(content: Any) -> ORJSONResponse:
+    """ORJSONResponse directa; si hay tipos que orjson no conoce, pasa antes
+    por jsonable_encoder"""
+    try:
+        return ORJSONResponse(content)
+    except TypeError:
+        return ORJSONResponse(jsonable_encoder(content))
+
+
 # Variable para tracking del tiempo de inicio
 start_time = time.time()
 
 # === ENDPOINTS DE LA API ===
 
 
-@app.get("/", response_class=FileResponse)
-async def read_index():
-    """Servir el archivo HTML principal"""
-    static_dir = os.path.join(os.path.dirname(__file__), "static")
-    return FileResponse(os.path.join(static_dir, "index.html"))
+# Lista de tablas serializada: (schema_version, tablas, cuerpo JSON, etag).
+# Solo cambia con un CREATE, que incrementa sql_engine.schema_version
+_tables_cache: Tuple[int, List[str], bytes, str] = (-1, [], b"[]", "")
+
 
+def _cached_tables() -> Tuple[List[str], bytes, str]:
+    """Tablas actuales, recalculadas solo si cambió el esquema (con _sql_lock)"""
+    global _tables_cache
+    version = sql_engine.schema_version
+    if _tables_cache[0] != version:
+        tables = sql_engine.list_tables()
+        body = orjson.dumps(tables)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        _tables_cache = (version, tables, body, etag)
+    return _tables_cache[1:]
 
-@app.get("/api/status", response_model=ServerStatus)
+
+@api_router.get("/status", response_model=ServerStatus)
 async def get_server_status():
     """Obtener el estado del servidor y parser"""
+    tables, _, _ = _tables_cache[1:]
+    # Sin esperar el lock en el event loop: si otra petición lo tiene (p. ej.
+    # una carga CSV), se informa el último conteo conocido
+    if _tables_cache[0] != sql_engine.schema_version and _sql_lock.acquire(
+        blocking=False
+    ):
+        try:
+            tables, _, _ = _cached_tables()
+        finally:
+            _sql_lock.release()
     return ServerStatus(
         status="running",
         parser_version="1.0.0",
-        tables_count=len(sql_engine.list_tables()),
+        tables_count=len(tables),
         uptime_seconds=time.time() - start_time,
     )
 
 
-@app.post("/api/execute", response_model=SQLResponse)
-async def execute_sql_query(query: SQLQuery):
+# Sin response_model: la respuesta se arma y serializa una sola vez con orjson
+@api_router.post("/execute", responses={200: {"model": SQLResponse}})
+def execute_sql_query(query: SQLQuery):
     """Ejecutar una consulta SQL usando el parser"""
     try:
         # Validación básica de entrada
@@ -153,33 +633,30 @@ async def execute_sql_query(query: SQLQuery):
             )
 
         # Ejecutar la consulta
-        result = sql_engine.execute_sql(query.sql, validate=query.should_validate)
+        with _sql_lock:
+            result = sql_engine.execute_sql(query.sql, validate=query.should_validate)
 
         # Determinar el tipo de consulta
         query_type = "unknown"
-        if result.get("parsed_query"):
-            parsed = result["parsed_query"]
-            if hasattr(parsed, "operation_type"):
-                query_type = parsed.operation_type.value
+        parsed = result.get("parsed_query")
+        if parsed is not None and hasattr(parsed, "operation_type"):
+            query_type = parsed.operation_type.value
 
-        # Formatear la respuesta
-        # Convertir parsed_query a dict si existe
+        # str(parsed) recorre todo el AST: solo si el cliente lo pide
         parsed_query_dict = None
-        if result.get("parsed_query"):
-            parsed = result["parsed_query"]
-            if hasattr(parsed, "__dict__"):
-                parsed_query_dict = {"type": query_type, "details": str(parsed)}
-
-        response = SQLResponse(
-            success=result["success"],
-            result=result.get("result"),
-            parsed_query=parsed_query_dict,
-            execution_time_ms=result["execution_time_ms"],
-            errors=result.get("errors", []),
-            query_type=query_type,
-        )
+        if query.include_parsed and hasattr(parsed, "__dict__"):
+            parsed_query_dict = {"type": query_type, "details": str(parsed)}
 
-        return response
+        return _orjson_response(
+            {
+                "success": result["success"],
+                "result": result.get("result"),
+                "parsed_query": parsed_query_dict,
+                "execution_time_ms": result["execution_time_ms"],
+                "errors": result.get("errors", []),
+                "query_type": query_type,
+            }
+        )
 
     except HTTPException:
         raise
@@ -191,53 +668,87 @@ async def execute_sql_query(query: SQLQuery):
         raise HTTPException(status_code=404, detail=f"Recurso no encontrado: {str(e)}")
     except Exception as e:
         # Otros errores inesperados
-        import traceback
-
-        error_trace = traceback.format_exc()
-        print(f"❌ Error inesperado:\n{error_trace}")
+        log.exception("❌ Error inesperado")
 
         raise HTTPException(
             status_code=500, detail=f"Error interno del servidor: {str(e)}"
         )
 
 
-@app.post("/api/validate")
-async def validate_sql_query(query: SQLQuery):
+@api_router.post("/explain")
+def explain_sql_query(query: SQLQuery):
+    """Parsear una consulta y devolver su AST como JSON, sin ejecutarla"""
+    if not query.sql or not query.sql.strip():
+        raise HTTPException(
+            status_code=400, detail="La consulta SQL no puede estar vacía"
+        )
+    try:
+        with _sql_lock:
+            parsed = sql_engine.parse_cached(query.sql)
+    except Exception as e:
+        return {"success": False, "ast": None, "error": str(e)}
+    return {
+        "success": True,
+        "query_type": parsed.operation_type.value,
+        "ast": parsed.to_dict(),
+        "error": None,
+    }
+
+
+# Prefijos para mensajes de error más amigables, en orden de prioridad
+_ERROR_TAGS = (("Se esperaba", "❌ Sintaxis: "), ("no existe", "⚠️  "))
+
+
+def _friendly_error(error: str) -> str:
+    for sub, prefix in _ERROR_TAGS:
+        if sub in error:
+            return prefix + error
+    return error
+
+
+# Respuestas de /validate y /parse memorizadas por (sql, schema_version): un
+# CREATE incrementa la versión y las entradas anteriores dejan de usarse
+@lru_cache(maxsize=2048)
+def _validate_cached(sql: str, schema_version: int) -> Tuple[bool, Tuple[str, ...]]:
+    with _sql_lock:
+        success, errors = sql_engine.validate_only(sql)
+    return success, tuple(_friendly_error(e) for e in errors)
+
+
+@lru_cache(maxsize=2048)
+def _parse_only_cached(sql: str, schema_version: int) -> Tuple[bool, str]:
+    with _sql_lock:
+        success, parsed = sql_engine.parse_only(sql)
+    return success, str(parsed)
+
+
+@api_router.post("/validate")
+def validate_sql_query(query: SQLQuery):
     """Validar una consulta SQL sin ejecutarla"""
     try:
         if not query.sql or not query.sql.strip():
             return {"valid": False, "errors": ["La consulta SQL no puede estar vacía"]}
 
-        success, errors = sql_engine.validate_only(query.sql)
-
-        # Proporcionar mensajes de error más amigables
-        friendly_errors = []
-        for error in errors:
-            if "Se esperaba" in error:
-                friendly_errors.append(f"❌ Sintaxis: {error}")
-            elif "no existe" in error:
-                friendly_errors.append(f"⚠️  {error}")
-            else:
-                friendly_errors.append(error)
+        success, errors = _validate_cached(query.sql, sql_engine.schema_version)
 
         return {
             "valid": success,
-            "errors": friendly_errors if not success else [],
+            "errors": list(errors) if not success else [],
             "message": "Consulta válida ✓" if success else "Consulta contiene errores",
         }
     except Exception as e:
         return {"valid": False, "errors": [f"Error al validar: {str(e)}"]}
 
 
-@app.get("/api/parse/{sql_query}")
-async def parse_sql_query(sql_query: str):
+@api_router.get("/parse/{sql_query}")
+def parse_sql_query(sql_query: str):
     """Parsear una consulta SQL sin ejecutarla"""
     try:
-        success, parsed = sql_engine.parse_only(sql_query)
+        success, parsed = _parse_only_cached(sql_query, sql_engine.schema_version)
         return {
             "success": success,
-            "parsed_query": str(parsed) if success else None,
-            "error": str(parsed) if not success else None,
+            "parsed_query": parsed if success else None,
+            "error": parsed if not success else None,
         }
     except Exception as e:
         raise HTTPException(
@@ -245,22 +756,25 @@ async def parse_sql_query(sql_query: str):
         )
 
 
-@app.get("/api/tables", response_model=List[str])
-async def get_tables():
+@api_router.get("/tables", responses={200: {"model": List[str]}})
+def get_tables(request: Request):
     """Obtener lista de tablas creadas"""
     try:
-        return sql_engine.list_tables()
+        with _sql_lock:
+            _, body, etag = _cached_tables()
+        return _json_bytes_response(request, body, etag)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error obteniendo tablas: {str(e)}"
         )
 
 
-@app.get("/api/tables/{table_name}")
-async def get_table_info(table_name: str):
+@api_router.get("/tables/{table_name}")
+def get_table_info(table_name: str):
     """Obtener información detallada de una tabla"""
     try:
-        info = sql_engine.get_table_info(table_name)
+        with _sql_lock:
+            info = sql_engine.get_table_info(table_name)
         if not info:
             raise HTTPException(
                 status_code=404, detail=f"Tabla '{table_name}' no encontrada"
@@ -288,19 +802,21 @@ async def get_table_info(table_name: str):
         )
 
 
+STRUCTURE_DESCRIPTIONS = {
+    "sequential": "✅ Sequential File - Datos ordenados, búsquedas O(log n)",
+    "btree": "⚡ B+ Tree - Búsquedas rápidas, excelente para rangos",
+    "isam": "📚 ISAM - Óptimo para tablas grandes estáticas",
+    "hash": "🚀 Hash - Búsquedas exactas ultra rápidas O(1)",
+    "rtree": "🌍 R-Tree - Consultas espaciales optimizadas",
+}
+
+
 def get_structure_description(structure: str) -> str:
     """Retorna descripción de la estructura de datos"""
-    descriptions = {
-        "sequential": "✅ Sequential File - Datos ordenados, búsquedas O(log n)",
-        "btree": "⚡ B+ Tree - Búsquedas rápidas, excelente para rangos",
-        "isam": "📚 ISAM - Óptimo para tablas grandes estáticas",
-        "hash": "🚀 Hash - Búsquedas exactas ultra rápidas O(1)",
-        "rtree": "🌍 R-Tree - Consultas espaciales optimizadas",
-    }
-    return descriptions.get(structure, "Estructura de datos no especificada")
+    return STRUCTURE_DESCRIPTIONS.get(structure, "Estructura de datos no especificada")
 
 
-@app.get("/api/history")
+@api_router.get("/history")
 async def get_query_history(limit: int = 10):
     """Obtener historial de consultas ejecutadas"""
     try:
@@ -312,7 +828,7 @@ async def get_query_history(limit: int = 10):
         )
 
 
-@app.get("/api/operations")
+@api_router.get("/operations")
 async def get_operations_log():
     """Obtener log de operaciones del adaptador de BD"""
     try:
@@ -324,7 +840,7 @@ async def get_operations_log():
         )
 
 
-@app.delete("/api/history")
+@api_router.delete("/history")
 async def clear_query_history():
     """Limpiar el historial de consultas"""
     try:
@@ -336,34 +852,32 @@ async def clear_query_history():
         )
 
 
-@app.get("/api/examples")
-async def get_sql_examples():
-    """Obtener ejemplos de consultas SQL con todas las estructuras de datos"""
-    examples = {
-        "create_tables": {
-            "sequential": "CREATE TABLE Empleados (id INT KEY INDEX SEQ, nombre VARCHAR[100], salario INT);",
-            "btree": "CREATE TABLE Productos (codigo INT KEY INDEX BTree, nombre VARCHAR[100], precio FLOAT);",
-            "isam": "CREATE TABLE Clientes (dni INT KEY INDEX ISAM, nombre VARCHAR[100], ciudad VARCHAR[50]);",
-            "hash": "CREATE TABLE Usuarios (username VARCHAR[50] KEY INDEX Hash, email VARCHAR[100], edad INT);",
-            "rtree": "CREATE TABLE Restaurantes (id INT KEY, nombre VARCHAR[100], ubicacion ARRAY[FLOAT] INDEX RTree);",
-        },
-        "insert_data": [
-            'INSERT INTO Empleados VALUES (1, "Ana García", 3500);',
-            'INSERT INTO Empleados VALUES (2, "Carlos López", 4500);',
-            'INSERT INTO Productos VALUES (101, "Laptop HP", 999.99);',
-            'INSERT INTO Restaurantes VALUES (1, "La Bella Italia", [12.0462, -77.0428]);',
-        ],
-        "select_queries": {
-            "exact_search": "SELECT * FROM Empleados WHERE id = 1;",
-            "range_search": "SELECT * FROM Productos WHERE codigo BETWEEN 100 AND 200;",
-            "spatial_search": "SELECT * FROM Restaurantes WHERE ubicacion IN ([12.05, -77.04], 0.01);",
-            "full_scan": "SELECT * FROM Empleados;",
-        },
-        "delete_queries": [
-            "DELETE FROM Empleados WHERE id = 1;",
-            "DELETE FROM Productos WHERE codigo = 101;",
-        ],
-        "complete_workflow": """-- Flujo completo: CREATE → INSERT → SELECT → DELETE
+# Ejemplos de SQL: constantes, se serializan una sola vez al importar
+SQL_EXAMPLES = {
+    "create_tables": {
+        "sequential": "CREATE TABLE Empleados (id INT KEY INDEX SEQ, nombre VARCHAR[100], salario INT);",
+        "btree": "CREATE TABLE Productos (codigo INT KEY INDEX BTree, nombre VARCHAR[100], precio FLOAT);",
+        "isam": "CREATE TABLE Clientes (dni INT KEY INDEX ISAM, nombre VARCHAR[100], ciudad VARCHAR[50]);",
+        "hash": "CREATE TABLE Usuarios (username VARCHAR[50] KEY INDEX Hash, email VARCHAR[100], edad INT);",
+        "rtree": "CREATE TABLE Restaurantes (id INT KEY, nombre VARCHAR[100], ubicacion ARRAY[FLOAT] INDEX RTree);",
+    },
+    "insert_data": [
+        'INSERT INTO Empleados VALUES (1, "Ana García", 3500);',
+        'INSERT INTO Empleados VALUES (2, "Carlos López", 4500);',
+        'INSERT INTO Productos VALUES (101, "Laptop HP", 999.99);',
+        'INSERT INTO Restaurantes VALUES (1, "La Bella Italia", [12.0462, -77.0428]);',
+    ],
+    "select_queries": {
+        "exact_search": "SELECT * FROM Empleados WHERE id = 1;",
+        "range_search": "SELECT * FROM Productos WHERE codigo BETWEEN 100 AND 200;",
+        "spatial_search": "SELECT * FROM Restaurantes WHERE ubicacion IN ([12.05, -77.04], 0.01);",
+        "full_scan": "SELECT * FROM Empleados;",
+    },
+    "delete_queries": [
+        "DELETE FROM Empleados WHERE id = 1;",
+        "DELETE FROM Productos WHERE codigo = 101;",
+    ],
+    "complete_workflow": """-- Flujo completo: CREATE → INSERT → SELECT → DELETE
 CREATE TABLE Productos (
     codigo INT KEY INDEX BTree,
     nombre VARCHAR[100],
@@ -382,84 +896,123 @@ SELECT * FROM Productos WHERE codigo BETWEEN 1 AND 2;
 DELETE FROM Productos WHERE codigo = 2;
 
 SELECT * FROM Productos;""",
-    }
-
-    return examples
-
-
-@app.post("/api/upload-csv")
-async def upload_csv_file(file: UploadFile = File(...), table_name: str = None):
-    """Cargar un archivo CSV y crear una tabla con sus datos"""
-    try:
-        # Validar que sea un archivo CSV
-        if not file.filename:
-            raise HTTPException(
-                status_code=400, detail="No se proporcionó ningún archivo"
-            )
+}
+_EXAMPLES_BODY = orjson.dumps(SQL_EXAMPLES)
+_EXAMPLES_ETAG = f'"{hashlib.sha1(_EXAMPLES_BODY).hexdigest()[:16]}"'
 
-        if not file.filename.endswith(".csv"):
-            raise HTTPException(
-                status_code=400,
-                detail=f"El archivo debe ser un CSV. Recibido: {file.filename}",
-            )
 
-        # Leer el contenido del archivo
-        contents = await file.read()
-        decoded = contents.decode("utf-8")
-        csv_reader = csv.DictReader(io.StringIO(decoded))
+@api_router.get("/examples")
+async def get_sql_examples(request: Request):
+    """Obtener ejemplos de consultas SQL con todas las estructuras de datos"""
+    return _json_bytes_response(request, _EXAMPLES_BODY, _EXAMPLES_ETAG)
 
-        # Obtener las columnas del CSV
-        fieldnames = csv_reader.fieldnames
-        if not fieldnames:
-            raise HTTPException(
-                status_code=400,
-                detail="El archivo CSV está vacío o no tiene encabezados",
-            )
 
-        # Usar el nombre del archivo como nombre de tabla si no se proporciona
-        if not table_name:
-            table_name = file.filename.replace(".csv", "").replace(" ", "_")
+# Orden de generalidad de los tipos inferidos para columnas CSV
+_CSV_TYPE_RANK = {None: -1, "INT": 0, "FLOAT": 1, "VARCHAR": 2}
+CSV_BATCH_ROWS = 10_000
 
-        # Leer todas las filas para inferir tipos de datos
-        rows = list(csv_reader)
-        if not rows:
-            raise HTTPException(
-                status_code=400, detail="El archivo CSV no contiene datos"
-            )
 
-        # Inferir tipos de datos basándose en la primera fila
-        column_types = []
-        for col in fieldnames:
-            sample_value = rows[0].get(col, "")
+def _infer_csv_type(values: np.ndarray) -> Tuple[Optional[str], int]:
+    """Infiere el tipo de un lote de celdas de una columna CSV.
 
-            # Intentar determinar el tipo
-            try:
-                int(sample_value)
-                col_type = "INT"
-            except ValueError:
-                try:
-                    float(sample_value)
-                    col_type = "FLOAT"
-                except ValueError:
-                    # Es un string, determinar tamaño
-                    max_len = max(len(str(row.get(col, ""))) for row in rows)
-                    col_type = f"VARCHAR[{max(max_len + 10, 50)}]"
-
-            column_types.append((col, col_type))
-
-        # Construir consulta CREATE TABLE
-        # La primera columna será la KEY
-        columns_def = []
-        for i, (col, col_type) in enumerate(column_types):
-            if i == 0:
-                columns_def.append(f"{col} {col_type} KEY")
-            else:
-                columns_def.append(f"{col} {col_type}")
+    Las conversiones las hace NumPy en C sobre todo el lote; las celdas
+    vacías no cuentan (se cargan como 0 en columnas numéricas). Retorna
+    (tipo o None si todo está vacío, largo máximo).
+    """
+    max_len = int(np.char.str_len(values).max()) if values.size else 0
+    non_empty = values[values != ""]
+    if not non_empty.size:
+        return None, max_len
+    for np_type, col_type in ((np.int64, "INT"), (np.float64, "FLOAT")):
+        try:
+            non_empty.astype(np_type)
+            return col_type, max_len
+        except (ValueError, OverflowError):
+            pass
+    return "VARCHAR", max_len
+
+
+def _csv_rows(reader, n_cols: int):
+    """Filas no vacías del CSV ajustadas al número de columnas"""
+    for row in reader:
+        if row:
+            yield (row + [""] * n_cols)[:n_cols]
+
+
+def _csv_batches(rows, size: int = CSV_BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_caster(col_type: str):
+    """Conversor de celdas CSV para un tipo de columna (vacío -> 0 en numéricos)"""
+    if "INT" in col_type:
+        return lambda v: int(v) if v else 0
+    if "FLOAT" in col_type:
+        return lambda v: float(v) if v else 0.0
+    return str
+
+
+def _load_csv(stream: io.TextIOBase, table_name: str) -> Dict[str, Any]:
+    """Crea la tabla e inserta el CSV en dos pasadas sobre el stream.
+
+    La primera infiere tipos por lotes y la segunda (tras ``seek(0)``)
+    inserta; nunca se mantiene el archivo completo en memoria.
+    """
+    csv_reader = csv.reader(stream)
+
+    # Obtener las columnas del CSV
+    fieldnames = next(csv_reader, None)
+    if not fieldnames:
+        raise HTTPException(
+            status_code=400,
+            detail="El archivo CSV está vacío o no tiene encabezados",
+        )
+    n_cols = len(fieldnames)
+
+    # 1ª pasada: inferir tipos por lotes y combinarlos
+    kinds = [None] * n_cols
+    max_lens = [0] * n_cols
+    total_rows = 0
+    for batch in _csv_batches(_csv_rows(csv_reader, n_cols)):
+        total_rows += len(batch)
+        for i, values in enumerate(zip(*batch)):
+            kind, max_len = _infer_csv_type(np.array(values, dtype=str))
+            if _CSV_TYPE_RANK[kind] > _CSV_TYPE_RANK[kinds[i]]:
+                kinds[i] = kind
+            max_lens[i] = max(max_lens[i], max_len)
+
+    if not total_rows:
+        raise HTTPException(status_code=400, detail="El archivo CSV no contiene datos")
+
+    column_types = [
+        (col, kind if kind in ("INT", "FLOAT") else f"VARCHAR[{max(max_len + 10, 50)}]")
+        for col, kind, max_len in zip(fieldnames, kinds, max_lens)
+    ]
+
+    # Construir consulta CREATE TABLE
+    # La primera columna será la KEY
+    columns_def = []
+    for i, (col, col_type) in enumerate(column_types):
+        if i == 0:
+            columns_def.append(f"{col} {col_type} KEY")
+        else:
+            columns_def.append(f"{col} {col_type}")
 
-        create_table_sql = f"CREATE TABLE {table_name} ({', '.join(columns_def)});"
+    create_table_sql = f"CREATE TABLE {table_name} ({', '.join(columns_def)});"
 
+    # CREATE TABLE e inserción en una sola sección crítica
+    with _sql_lock:
         # Ejecutar CREATE TABLE
-        create_result = sql_engine.execute_sql(create_table_sql, validate=True)
+        create_result = sql_engine.execute_sql(
+            create_table_sql, validate=True, measure=False
+        )
 
         if not create_result["success"]:
             raise HTTPException(
@@ -467,45 +1020,54 @@ async def upload_csv_file(file: UploadFile = File(...), table_name: str = None):
                 detail=f"Error creando tabla: {', '.join(create_result.get('errors', []))}",
             )
 
-        # Insertar los datos
-        inserted_count = 0
-        errors = []
+        # 2ª pasada: insertar directamente en la estructura, sin generar SQL;
+        # los conversores de cada columna se resuelven una sola vez
+        stream.seek(0)
+        csv_reader = csv.reader(stream)
+        next(csv_reader, None)
+        casters = [_csv_caster(col_type) for _, col_type in column_types]
+        inserted_count, errors = database_adapter.bulk_insert(
+            table_name, _csv_rows(csv_reader, n_cols), casters
+        )
 
-        for row in rows:
-            values = []
-            for col, col_type in column_types:
-                value = row.get(col, "")
+    return {
+        "success": True,
+        "table_name": table_name,
+        "columns": n_cols,
+        "rows_processed": total_rows,
+        "rows_inserted": inserted_count,
+        "errors": errors[:10] if errors else [],  # Limitar a 10 errores
+        "create_table_sql": create_table_sql,
+    }
 
-                # Formatear el valor según el tipo
-                if "INT" in col_type or "FLOAT" in col_type:
-                    values.append(str(value) if value else "0")
-                else:
-                    # Escapar comillas en strings
-                    escaped_value = str(value).replace('"', '\\"')
-                    values.append(f'"{escaped_value}"')
 
-            insert_sql = f"INSERT INTO {table_name} VALUES ({', '.join(values)});"
+@api_router.post("/upload-csv")
+async def upload_csv_file(file: UploadFile = File(...), table_name: str = None):
+    """Cargar un archivo CSV y crear una tabla con sus datos"""
+    try:
+        # Validar que sea un archivo CSV
+        if not file.filename:
+            raise HTTPException(
+                status_code=400, detail="No se proporcionó ningún archivo"
+            )
 
-            try:
-                insert_result = sql_engine.execute_sql(insert_sql, validate=True)
-                if insert_result["success"]:
-                    inserted_count += 1
-                else:
-                    errors.append(
-                        f"Fila {inserted_count + 1}: {', '.join(insert_result.get('errors', []))}"
-                    )
-            except Exception as e:
-                errors.append(f"Fila {inserted_count + 1}: {str(e)}")
+        if not file.filename.endswith(".csv"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"El archivo debe ser un CSV. Recibido: {file.filename}",
+            )
 
-        return {
-            "success": True,
-            "table_name": table_name,
-            "columns": len(fieldnames),
-            "rows_processed": len(rows),
-            "rows_inserted": inserted_count,
-            "errors": errors[:10] if errors else [],  # Limitar a 10 errores
-            "create_table_sql": create_table_sql,
-        }
+        # Usar el nombre del archivo como nombre de tabla si no se proporciona
+        if not table_name:
+            table_name = file.filename.replace(".csv", "").replace(" ", "_")
+
+        # Leer el archivo en streaming (sin copiarlo entero a memoria) y
+        # procesarlo fuera del event loop
+        stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+        try:
+            return await run_in_threadpool(_load_csv, stream, table_name)
+        finally:
+            stream.detach()
 
     except HTTPException:
         raise
@@ -515,12 +1077,13 @@ async def upload_csv_file(file: UploadFile = File(...), table_name: str = None):
         )
 
 
-@app.get("/api/table-data/{table_name}")
-async def get_table_data(table_name: str, limit: int = 100):
+@api_router.get("/table-data/{table_name}")
+def get_table_data(table_name: str, limit: int = 100):
     """Obtener datos de una tabla con límite"""
     try:
         sql = f"SELECT * FROM {table_name};"
-        result = sql_engine.execute_sql(sql, validate=True)
+        with _sql_lock:
+            result = sql_engine.execute_sql(sql, validate=True, measure=False)
 
         if not result["success"]:
             raise HTTPException(
@@ -556,15 +1119,12 @@ async def get_table_data(table_name: str, limit: int = 100):
 # ==================== ENDPOINTS PARA SIFT (BÚSQUEDA DE IMÁGENES) ====================
 
 
-@app.post("/api/sift/create-table")
+@api_router.post("/sift/create-table")
 async def create_sift_table(table_name: str = "ImagenesMultimedia"):
     """Crear tabla para almacenar imágenes con índice SIFT"""
     global sift_image_manager
 
     try:
-        # Rutas de archivos
-        base_dir = os.path.join(os.path.dirname(__file__), "..")
-
         # Configuración optimizada
         config = SIFTConfig(
             image_size=512,
@@ -575,11 +1135,12 @@ async def create_sift_table(table_name: str = "ImagenesMultimedia"):
 
         # Inicializar el motor SIFT
         sift_image_manager = SIFTEngine(
-            base_dir=base_dir,
+            base_dir=PROJECT_DIR,
             data_dir="api/data/sift",
             config=config,
             force_create=True,
         )
+        _invalidate_image_cache()
 
         return {
             "success": True,
@@ -599,7 +1160,7 @@ async def create_sift_table(table_name: str = "ImagenesMultimedia"):
         )
 
 
-@app.post("/api/sift/upload-image")
+@api_router.post("/sift/upload-image")
 async def upload_image(
     file: UploadFile = File(...),
     image_id: Optional[int] = Form(None),
@@ -611,9 +1172,7 @@ async def upload_image(
     # Auto-crear motor si no existe
     if sift_image_manager is None:
         try:
-            print("[SIFT] Creando motor por primera vez...")
-            base_dir = os.path.join(os.path.dirname(__file__), "..")
-
+            log.debug("[SIFT] Creando motor por primera vez...")
             config = SIFTConfig(
                 image_size=512,
                 use_root_sift=True,
@@ -622,21 +1181,21 @@ async def upload_image(
             )
 
             sift_image_manager = SIFTEngine(
-                base_dir=base_dir,
+                base_dir=PROJECT_DIR,
                 data_dir="api/data/sift",
                 config=config,
                 force_create=False,
             )
-            print("[SIFT] Motor creado exitosamente")
+            log.debug("[SIFT] Motor creado exitosamente")
         except Exception as e:
-            print(f"[SIFT ERROR] {str(e)}")
+            log.error("[SIFT ERROR] %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error creando motor SIFT: {str(e)}",
             )
 
     try:
-        print(f"[SIFT] Procesando imagen: {file.filename}")
+        log.debug("[SIFT] Procesando imagen: %s", file.filename)
 
         # Validar que sea una imagen
         if not file.content_type or not file.content_type.startswith("image/"):
@@ -647,14 +1206,9 @@ async def upload_image(
 
         # Auto-generar ID si no se proporciona
         if image_id is None:
-            all_images = sift_image_manager.get_all_images()
-            if all_images:
-                max_id = max(img["id"] for img in all_images)
-                image_id = max_id + 1
-            else:
-                image_id = 1
+            image_id = sift_image_manager.next_id()
 
-        print(f"[SIFT] Asignado ID: {image_id}")
+        log.debug("[SIFT] Asignado ID: %s", image_id)
 
         # Generar nombre si no se proporciona
         if not image_name:
@@ -666,13 +1220,14 @@ async def upload_image(
         image_path = os.path.join(IMAGES_DIR, image_filename)
 
         # Guardar el archivo
-        print("[SIFT] Guardando archivo en disco...")
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        log.debug("[SIFT] Guardando archivo en disco...")
+        await run_in_threadpool(_save_upload, file.file, image_path)
 
         # Agregar al índice SIFT
-        print("[SIFT] Extrayendo descriptores SIFT y actualizando índice...")
-        result = sift_image_manager.add_image(image_id, image_name, image_path)
+        log.debug("[SIFT] Extrayendo descriptores SIFT y actualizando índice...")
+        result = await run_in_threadpool(
+            sift_image_manager.add_image, image_id, image_name, image_path
+        )
 
         if not result["success"]:
             # Limpiar archivo si hay error
@@ -681,15 +1236,18 @@ async def upload_image(
             raise HTTPException(
                 status_code=400, detail=result.get("error", "Error desconocido")
             )
+        _invalidate_image_cache()
 
         # Construir mensaje según el resultado
         if result.get("has_vocabulary"):
             message = "Imagen subida e indexada exitosamente con TF-IDF"
-            print(f"[SIFT] ✓ Imagen indexada (ID: {image_id})")
+            log.debug("[SIFT] ✓ Imagen indexada (ID: %s)", image_id)
         else:
             images_needed = result.get("images_needed", 0)
             message = f"Imagen guardada. Vocabulario pendiente (faltan {images_needed} imágenes)"
-            print(f"[SIFT] ✓ Imagen guardada, vocabulario pendiente (ID: {image_id})")
+            log.debug(
+                "[SIFT] ✓ Imagen guardada, vocabulario pendiente (ID: %s)", image_id
+            )
 
         return {
             "success": True,
@@ -705,17 +1263,14 @@ async def upload_image(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[SIFT ERROR] {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        log.exception("[SIFT ERROR] %s", e)
         # Limpiar archivo si hay error
         if "image_path" in locals() and os.path.exists(image_path):
             os.remove(image_path)
         raise HTTPException(status_code=500, detail=f"Error subiendo imagen: {str(e)}")
 
 
-@app.post("/api/sift/search-similar")
+@api_router.post("/sift/search-similar")
 async def search_similar_images(
     file: UploadFile = File(...), k: int = Form(10), use_inverted: bool = Form(True)
 ):
@@ -738,12 +1293,11 @@ async def search_similar_images(
         query_temp_path = os.path.join(
             IMAGES_DIR, f"query_temp_{int(time.time() * 1000)}.jpg"
         )
-        with open(query_temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(_save_upload, file.file, query_temp_path)
 
-        # Realizar búsqueda KNN
-        similar_data = sift_image_manager.search(
-            query_temp_path, k=k, use_inverted=use_inverted
+        # Realizar búsqueda KNN (extracción SIFT: CPU, fuera del event loop)
+        similar_data = await run_in_threadpool(
+            sift_image_manager.search, query_temp_path, k=k, use_inverted=use_inverted
         )
 
         # Formatear resultados
@@ -755,10 +1309,9 @@ async def search_similar_images(
                 "similarity": float(similarity),
                 "position": pos,
             }
-            print(f"[DEBUG] Image result: {image_info}")
             results.append(image_info)
 
-        print(f"[DEBUG] Total results: {len(results)}")
+        log.debug("[SIFT] Resultados: %s", results)
         return {
             "success": True,
             "results": results,
@@ -782,9 +1335,14 @@ async def search_similar_images(
                 pass
 
 
-@app.get("/api/sift/images")
-async def list_all_images():
-    """Listar todas las imágenes en el sistema"""
+SIFT_PAGE_LIMIT = 200
+
+
+@api_router.get("/sift/images")
+async def list_all_images(
+    request: Request, offset: int = 0, limit: int = SIFT_PAGE_LIMIT
+):
+    """Listar las imágenes del sistema, paginadas con offset/limit"""
     global sift_image_manager
 
     if sift_image_manager is None:
@@ -795,13 +1353,37 @@ async def list_all_images():
             "message": "No hay motor SIFT inicializado",
         }
 
-    try:
-        images = sift_image_manager.get_all_images()
+    offset = max(offset, 0)
+    limit = min(max(limit, 0), SIFT_PAGE_LIMIT * 5)
 
-        return {"success": True, "images": images, "count": len(images)}
+    try:
+        # El ETag depende del total y del mtime del Heap: si no hubo altas, el
+        # cliente que vuelve a consultar recibe 304 sin leer registros
+        total = sift_image_manager.count_images()
+        mtime = os.stat(sift_image_manager.heap_path).st_mtime_ns
+        etag = f'W/"{total:x}-{mtime:x}-{offset:x}-{limit:x}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        images = await run_in_threadpool(
+            sift_image_manager.get_all_images, offset, limit
+        )
+        body = orjson.dumps(
+            {
+                "success": True,
+                "images": images,
+                "count": len(images),
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+            }
+        )
+        return Response(
+            content=body, media_type="application/json", headers={"ETag": etag}
+        )
 
     except Exception as e:
-        print(f"[ERROR] Error listando imágenes: {str(e)}")
+        log.error("[ERROR] Error listando imágenes: %s", e)
         return {
             "success": True,
             "images": [],
@@ -810,7 +1392,7 @@ async def list_all_images():
         }
 
 
-@app.get("/api/sift/image/{image_id}")
+@api_router.get("/sift/image/{image_id}")
 async def get_image_by_id(image_id: int):
     """Obtener información de una imagen por su ID"""
     global sift_image_manager
@@ -819,14 +1401,9 @@ async def get_image_by_id(image_id: int):
         raise HTTPException(status_code=400, detail="No hay motor SIFT inicializado")
 
     try:
-        images = sift_image_manager.get_all_images()
-
-        for img in images:
-            if img["id"] == image_id:
-                return {
-                    "success": True,
-                    "image": img,
-                }
+        img = sift_image_manager.get_image(image_id)
+        if img is not None:
+            return {"success": True, "image": img}
 
         raise HTTPException(
             status_code=404, detail=f"Imagen con ID {image_id} no encontrada"
@@ -840,46 +1417,74 @@ async def get_image_by_id(image_id: int):
         )
 
 
-@app.get("/api/sift/image-file/{image_id}")
-async def get_image_file(image_id: int):
+@api_router.get("/sift/image-file/{image_id}")
+async def get_image_file(image_id: int, request: Request):
     """Obtener el archivo de imagen por su ID"""
     global sift_image_manager
 
     if sift_image_manager is None:
         raise HTTPException(status_code=400, detail="No hay motor SIFT inicializado")
 
+    # Solo la construcción del índice puede fallar; el resto es memoria
     try:
-        images = sift_image_manager.get_all_images()
-        image_path = None
-
-        for img in images:
-            if img["id"] == image_id:
-                ruta = img["ruta"]
-                # Convertir ruta relativa a absoluta
-                image_path = os.path.join(os.path.dirname(__file__), "..", ruta)
-                break
-
-        if not image_path or not os.path.exists(image_path):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Archivo de imagen no encontrado para ID {image_id}",
-            )
-
-        return FileResponse(
-            image_path,
-            media_type="image/jpeg",
-            headers={"Cache-Control": "public, max-age=3600"},
-        )
-
-    except HTTPException:
-        raise
+        entry = (await _get_image_index()).get(image_id)
+        if (
+            entry is None
+            and time.monotonic() - _image_index_built_at
+            >= IMAGE_INDEX_REBUILD_INTERVAL
+        ):
+            # Camino frío: la imagen pudo agregarse fuera de la API después de
+            # armar el índice
+            entry = (await _get_image_index(rebuild=True)).get(image_id)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error obteniendo archivo de imagen: {str(e)}"
         )
 
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Archivo de imagen no encontrado para ID {image_id}",
+        )
+    image_path, etag, stat_result, headers = entry
+    thumb = _image_thumbs.get(image_id)
+
+    # El cliente ya tiene esta versión: responder sin cuerpo
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, etag) or (
+        if_none_match is None
+        and request.headers.get("if-modified-since") == headers["Last-Modified"]
+    ):
+        return Response(status_code=304, headers=headers)
+
+    # Rango parcial, salvo que If-Range indique que la copia del cliente cambió
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range in (None, etag, headers["Last-Modified"]):
+        try:
+            byte_range = _parse_range(range_header, stat_result.st_size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{stat_result.st_size}"},
+            )
+
+    # Las miniaturas precargadas salen directo de memoria
+    if thumb is not None and byte_range is None:
+        return Response(content=thumb, media_type="image/jpeg", headers=headers)
+
+    return ImageFileResponse(
+        image_id,
+        image_path,
+        media_type="image/jpeg",
+        headers=headers,
+        stat_result=stat_result,
+        byte_range=byte_range,
+    )
+
 
-@app.get("/api/sift/stats")
+@api_router.get("/sift/stats")
 async def get_sift_stats():
     """Obtener estadísticas del índice SIFT"""
     global sift_image_manager
@@ -896,7 +1501,7 @@ async def get_sift_stats():
         )
 
 
-@app.post("/api/sift/rebuild")
+@api_router.post("/sift/rebuild")
 async def rebuild_sift_index():
     """Reconstruir el índice SIFT completo"""
     global sift_image_manager
@@ -919,7 +1524,7 @@ async def rebuild_sift_index():
 # ==================== ENDPOINTS PARA BOW (BAG OF WORDS) ====================
 
 
-@app.post("/api/bow/create-index")
+@api_router.post("/bow/create-index")
 async def create_bow_index(collection_name: str = "bow_collection"):
     """Crear un índice BOW nuevo"""
     global bow_indexer, bow_query_engine
@@ -945,11 +1550,54 @@ async def create_bow_index(collection_name: str = "bow_collection"):
         )
 
 
-@app.post("/api/bow/upload-documents")
+def _load_and_tokenize(fileobj) -> List[str]:
+    """Lee un documento en bloques de 1 MiB, lo decodifica en UTF-8 de forma
+    incremental y lo preprocesa. Se ejecuta en el threadpool."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    while chunk := fileobj.read(UPLOAD_COPY_CHUNK):
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return bow_preprocessor.preprocess("".join(parts))
+
+
+# Procesos para tokenizar documentos BOW fuera del GIL (0 = usar el threadpool)
+BOW_TOKENIZE_WORKERS = int(os.environ.get("BOW_TOKENIZE_WORKERS", "0"))
+_tokenize_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_tokenize_pool() -> Optional[ProcessPoolExecutor]:
+    global _tokenize_pool
+    if BOW_TOKENIZE_WORKERS > 0 and _tokenize_pool is None:
+        _tokenize_pool = ProcessPoolExecutor(max_workers=BOW_TOKENIZE_WORKERS)
+    return _tokenize_pool
+
+
+async def _tokenize_upload(file: UploadFile) -> List[str]:
+    """Tokeniza un documento subido sin bloquear el event loop.
+
+    Con BOW_TOKENIZE_WORKERS > 0 el archivo se lee en el threadpool y los bytes
+    se decodifican y preprocesan en un proceso aparte; si no, todo ocurre en el
+    threadpool con _load_and_tokenize.
+    """
+    pool = _get_tokenize_pool()
+    if pool is None:
+        return await run_in_threadpool(_load_and_tokenize, file.file)
+    content = await run_in_threadpool(file.file.read)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, tokenize_bytes, content)
+
+
+@api_router.post("/bow/upload-documents")
 async def upload_documents(
-    files: List[UploadFile] = File(...), collection_name: str = Form("bow_collection")
+    files: List[UploadFile] = File(...),
+    collection_name: str = Form("bow_collection"),
+    block_size_limit: Optional[int] = Form(None),
 ):
-    """Subir múltiples documentos de texto y agregarlos al índice BOW"""
+    """Subir múltiples documentos de texto y agregarlos al índice BOW.
+
+    block_size_limit (opcional) fija cuántos términos caben en memoria antes de
+    volcar un bloque SPIMI a disco."""
     global bow_indexer, bow_query_engine
 
     try:
@@ -960,22 +1608,41 @@ async def upload_documents(
             os.makedirs(index_dir, exist_ok=True)
             bow_indexer = SPIMIIndexer(block_size_limit=10000, output_dir=index_dir)
 
+        if block_size_limit is not None:
+            if block_size_limit <= 0:
+                raise HTTPException(
+                    status_code=400, detail="block_size_limit debe ser mayor que 0"
+                )
+            bow_indexer.block_size_limit = block_size_limit
+
         processed_docs = []
         errors = []
 
+        # Lectura y preprocesamiento de todos los archivos en paralelo (threadpool
+        # o procesos); el diccionario SPIMI no es thread-safe, así que se llena
+        # después en orden
+        pending = {
+            idx: _tokenize_upload(file)
+            for idx, file in enumerate(files)
+            if file.filename.endswith((".txt", ".text"))
+        }
+        tokenized = dict(
+            zip(
+                pending,
+                await asyncio.gather(*pending.values(), return_exceptions=True),
+            )
+        )
+
         for idx, file in enumerate(files):
             try:
                 # Validar que sea archivo de texto
-                if not file.filename.endswith((".txt", ".text")):
+                if idx not in tokenized:
                     errors.append(f"{file.filename}: Solo se aceptan archivos .txt")
                     continue
 
-                # Leer contenido
-                content = await file.read()
-                text = content.decode("utf-8")
-
-                # Preprocesar texto
-                tokens = bow_preprocessor.preprocess(text)
+                tokens = tokenized[idx]
+                if isinstance(tokens, Exception):
+                    raise tokens
 
                 if not tokens:
                     errors.append(f"{file.filename}: No se encontraron tokens válidos")
@@ -983,7 +1650,13 @@ async def upload_documents(
 
                 # Agregar documento al índice
                 doc_id = idx + 1
-                bow_indexer.add_document(doc_id, tokens)
+                if bow_indexer.add_document(doc_id, tokens):
+                    # El diccionario llegó al límite y ya se volcó a disco
+                    log.debug(
+                        "Bloque SPIMI %d escrito tras el documento %d",
+                        bow_indexer.block_count - 1,
+                        doc_id,
+                    )
 
                 processed_docs.append(
                     {
@@ -1017,7 +1690,7 @@ async def upload_documents(
         )
 
 
-@app.post("/api/bow/build-index")
+@api_router.post("/bow/build-index")
 async def build_bow_index(
     collection_name: str = Form("bow_collection"), total_docs: int = Form(...)
 ):
@@ -1027,7 +1700,7 @@ async def build_bow_index(
     try:
         index_dir = os.path.join(BOW_DATA_DIR, collection_name)
 
-        if not os.path.exists(index_dir):
+        if not await _path_exists(index_dir):
             raise HTTPException(
                 status_code=404, detail=f"Colección '{collection_name}' no encontrada"
             )
@@ -1035,9 +1708,13 @@ async def build_bow_index(
         # Si el indexer no está cargado, necesitamos recrearlo para merge
         if bow_indexer is None or bow_indexer.output_dir != index_dir:
             bow_indexer = SPIMIIndexer(block_size_limit=10000, output_dir=index_dir)
-            # Contar bloques existentes
-            block_files = [f for f in os.listdir(index_dir) if f.startswith("block_")]
-            bow_indexer.block_count = len(block_files)
+            # El indexer recupera block_count de block_count.bin; las colecciones
+            # anteriores a ese archivo se cuentan listando el directorio
+            if not os.path.exists(bow_indexer.block_count_file):
+                block_files = [
+                    f for f in os.listdir(index_dir) if f.startswith("block_")
+                ]
+                bow_indexer.block_count = len(block_files)
 
         # Merge blocks
         bow_indexer.merge_blocks()
@@ -1064,7 +1741,7 @@ async def build_bow_index(
         )
 
 
-@app.post("/api/bow/search")
+@api_router.post("/bow/search")
 async def search_bow(
     query: str = Form(...),
     k: int = Form(10),
@@ -1078,7 +1755,7 @@ async def search_bow(
 
         # Cargar query engine si no está cargado
         if bow_query_engine is None or bow_query_engine.index_dir != index_dir:
-            if not os.path.exists(os.path.join(index_dir, "tfidf_index.dat")):
+            if not await _path_exists(os.path.join(index_dir, "tfidf_index.dat")):
                 raise HTTPException(
                     status_code=404,
                     detail=f"Índice '{collection_name}' no encontrado. Primero suba documentos y construya el índice.",
@@ -1112,7 +1789,7 @@ async def search_bow(
         raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
 
 
-@app.get("/api/bow/collections")
+@api_router.get("/bow/collections")
 async def list_bow_collections():
     """Listar todas las colecciones BOW disponibles"""
     try:
@@ -1122,6 +1799,8 @@ async def list_bow_collections():
         collections = []
         for item in os.listdir(BOW_DATA_DIR):
             item_path = os.path.join(BOW_DATA_DIR, item)
+            if BOW_TRASH_MARKER in item:
+                continue
             if os.path.isdir(item_path):
                 # Verificar si tiene índice construido
                 has_index = os.path.exists(os.path.join(item_path, "tfidf_index.dat"))
@@ -1130,9 +1809,21 @@ async def list_bow_collections():
                 doc_count = 0
                 vocab_size = 0
 
-                if has_index:
+                meta_file = os.path.join(item_path, "meta.json")
+                if has_index and os.path.exists(meta_file):
+                    # Resumen escrito al construir el índice
+                    with open(meta_file, "r") as f:
+                        meta = json.load(f)
+                    doc_count = meta.get("documents_count", 0)
+                    vocab_size = meta.get("vocabulary_size", 0)
+                elif has_index:
+                    # Índices construidos antes de meta.json
+                    norms_bin = os.path.join(item_path, "doc_norms.bin")
                     norms_file = os.path.join(item_path, "doc_norms.dat")
-                    if os.path.exists(norms_file):
+                    if os.path.exists(norms_bin):
+                        # Cabecera de 8 bytes con el número de documentos
+                        doc_count = read_doc_norms_count(norms_bin)
+                    elif os.path.exists(norms_file):
                         with open(norms_file, "rb") as f:
                             doc_norms = pickle.load(f)
                             doc_count = len(doc_norms)
@@ -1158,7 +1849,7 @@ async def list_bow_collections():
         )
 
 
-@app.delete("/api/bow/collection/{collection_name}")
+@api_router.delete("/bow/collection/{collection_name}")
 async def delete_bow_collection(collection_name: str):
     """Eliminar una colección BOW completa"""
     global bow_indexer, bow_query_engine
@@ -1166,7 +1857,7 @@ async def delete_bow_collection(collection_name: str):
     try:
         index_dir = os.path.join(BOW_DATA_DIR, collection_name)
 
-        if not os.path.exists(index_dir):
+        if not await _path_exists(index_dir):
             raise HTTPException(
                 status_code=404, detail=f"Colección '{collection_name}' no encontrada"
             )
@@ -1177,8 +1868,10 @@ async def delete_bow_collection(collection_name: str):
         if bow_query_engine and bow_query_engine.index_dir == index_dir:
             bow_query_engine = None
 
-        # Eliminar directorio
-        shutil.rmtree(index_dir)
+        # Renombrar es atómico y no bloquea; el borrado real sigue en segundo plano
+        trash_dir = f"{index_dir}{BOW_TRASH_MARKER}{uuid.uuid4().hex}"
+        os.rename(index_dir, trash_dir)
+        _remove_in_background(trash_dir)
 
         return {
             "success": True,
@@ -1199,7 +1892,7 @@ async def delete_bow_collection(collection_name: str):
 # ==================== ENDPOINTS PARA AUDIO (MFCC) ====================
 
 
-@app.post("/api/audio/upload")
+@api_router.post("/audio/upload")
 async def upload_audio(
     file: UploadFile = File(...),
     audio_id: Optional[int] = Form(None),
@@ -1211,9 +1904,7 @@ async def upload_audio(
     # Auto-crear motor si no existe
     if audio_manager is None:
         try:
-            print("[AUDIO] Creando motor por primera vez...")
-            base_dir = os.path.join(os.path.dirname(__file__), "..")
-
+            log.debug("[AUDIO] Creando motor por primera vez...")
             config = AudioConfig(
                 sample_rate=22050,
                 n_mfcc=13,
@@ -1224,21 +1915,21 @@ async def upload_audio(
             )
 
             audio_manager = AudioEngine(
-                base_dir=base_dir,
+                base_dir=PROJECT_DIR,
                 data_dir="api/data/audio",
                 config=config,
                 force_create=False,
             )
-            print("[AUDIO] Motor creado exitosamente")
+            log.debug("[AUDIO] Motor creado exitosamente")
         except Exception as e:
-            print(f"[AUDIO ERROR] {str(e)}")
+            log.error("[AUDIO ERROR] %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error creando motor Audio: {str(e)}",
             )
 
     try:
-        print(f"[AUDIO] Procesando audio: {file.filename}")
+        log.debug("[AUDIO] Procesando audio: %s", file.filename)
 
         # Validar que sea un archivo de audio
         valid_types = ["audio/", "video/"]
@@ -1252,14 +1943,14 @@ async def upload_audio(
 
         # Auto-generar ID si no se proporciona
         if audio_id is None:
-            all_audios = audio_manager.get_all_audios()
+            all_audios = await run_in_threadpool(audio_manager.get_all_audios)
             if all_audios:
                 max_id = max(a["id"] for a in all_audios)
                 audio_id = max_id + 1
             else:
                 audio_id = 1
 
-        print(f"[AUDIO] Asignado ID: {audio_id}")
+        log.debug("[AUDIO] Asignado ID: %s", audio_id)
 
         # Generar nombre si no se proporciona
         if not audio_name:
@@ -1271,13 +1962,14 @@ async def upload_audio(
         audio_path = os.path.join(AUDIOS_DIR, audio_filename)
 
         # Guardar el archivo
-        print("[AUDIO] Guardando archivo en disco...")
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        log.debug("[AUDIO] Guardando archivo en disco...")
+        await run_in_threadpool(_save_upload, file.file, audio_path)
 
         # Agregar al índice MFCC
-        print("[AUDIO] Extrayendo características MFCC y actualizando índice...")
-        result = audio_manager.add_audio(audio_id, audio_name, audio_path)
+        log.debug("[AUDIO] Extrayendo características MFCC y actualizando índice...")
+        result = await run_in_threadpool(
+            audio_manager.add_audio, audio_id, audio_name, audio_path
+        )
 
         if not result["success"]:
             # Limpiar archivo si hay error
@@ -1290,11 +1982,13 @@ async def upload_audio(
         # Construir mensaje según el resultado
         if result.get("has_vocabulary"):
             message = "Audio subido e indexado exitosamente con TF-IDF"
-            print(f"[AUDIO] ✓ Audio indexado (ID: {audio_id})")
+            log.debug("[AUDIO] ✓ Audio indexado (ID: %s)", audio_id)
         else:
             audios_count = result.get("audios_count", 0)
             message = f"Audio guardado. Vocabulario pendiente ({audios_count}/5 audios)"
-            print(f"[AUDIO] ✓ Audio guardado, vocabulario pendiente (ID: {audio_id})")
+            log.debug(
+                "[AUDIO] ✓ Audio guardado, vocabulario pendiente (ID: %s)", audio_id
+            )
 
         return {
             "success": True,
@@ -1311,14 +2005,11 @@ async def upload_audio(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[AUDIO ERROR] {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        log.exception("[AUDIO ERROR] %s", e)
         raise HTTPException(status_code=500, detail=f"Error subiendo audio: {str(e)}")
 
 
-@app.post("/api/audio/search")
+@api_router.post("/audio/search")
 async def search_similar_audios(
     file: UploadFile = File(...), k: int = Form(10), use_inverted: bool = Form(True)
 ):
@@ -1347,11 +2038,12 @@ async def search_similar_audios(
         query_temp_path = os.path.join(
             AUDIOS_DIR, f"query_temp_{int(time.time() * 1000)}{file_ext}"
         )
-        with open(query_temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(_save_upload, file.file, query_temp_path)
 
-        # Realizar búsqueda KNN
-        result = audio_manager.search(query_temp_path, k=k, use_inverted=use_inverted)
+        # Realizar búsqueda KNN (extracción MFCC: CPU, fuera del event loop)
+        result = await run_in_threadpool(
+            audio_manager.search, query_temp_path, k=k, use_inverted=use_inverted
+        )
 
         if not result["success"]:
             raise HTTPException(
@@ -1382,7 +2074,7 @@ async def search_similar_audios(
                 pass
 
 
-@app.get("/api/audio/list")
+@api_router.get("/audio/list")
 async def list_all_audios():
     """Listar todos los audios en el sistema"""
     global audio_manager
@@ -1396,11 +2088,11 @@ async def list_all_audios():
         }
 
     try:
-        audios = audio_manager.get_all_audios()
+        audios = await run_in_threadpool(audio_manager.get_all_audios)
         return {"success": True, "audios": audios, "count": len(audios)}
 
     except Exception as e:
-        print(f"[ERROR] Error listando audios: {str(e)}")
+        log.error("[ERROR] Error listando audios: %s", e)
         return {
             "success": True,
             "audios": [],
@@ -1409,7 +2101,7 @@ async def list_all_audios():
         }
 
 
-@app.get("/api/audio/file/{audio_id}")
+@api_router.get("/audio/file/{audio_id}")
 async def get_audio_file(audio_id: int):
     """Obtener el archivo de audio por su ID"""
     global audio_manager
@@ -1420,16 +2112,16 @@ async def get_audio_file(audio_id: int):
         )
 
     try:
-        audios = audio_manager.get_all_audios()
+        audios = await run_in_threadpool(audio_manager.get_all_audios)
         audio_path = None
 
         for audio in audios:
             if audio["id"] == audio_id:
                 ruta = audio["ruta"]
-                audio_path = os.path.join(os.path.dirname(__file__), "..", ruta)
+                audio_path = os.path.join(PROJECT_DIR, ruta)
                 break
 
-        if not audio_path or not os.path.exists(audio_path):
+        if not audio_path or not await _path_exists(audio_path):
             raise HTTPException(
                 status_code=404,
                 detail=f"Archivo de audio no encontrado para ID {audio_id}",
@@ -1460,7 +2152,7 @@ async def get_audio_file(audio_id: int):
         )
 
 
-@app.get("/api/audio/stats")
+@api_router.get("/audio/stats")
 async def get_audio_stats():
     """Obtener estadísticas del índice de Audio"""
     global audio_manager
@@ -1469,7 +2161,7 @@ async def get_audio_stats():
         return {"success": False, "message": "No hay motor de Audio inicializado"}
 
     try:
-        stats = audio_manager.get_stats()
+        stats = await run_in_threadpool(audio_manager.get_stats)
         return {"success": True, "stats": stats}
     except Exception as e:
         raise HTTPException(
@@ -1477,7 +2169,7 @@ async def get_audio_stats():
         )
 
 
-@app.post("/api/audio/rebuild")
+@api_router.post("/audio/rebuild")
 async def rebuild_audio_index():
     """Reconstruir el índice de Audio completo"""
     global audio_manager
@@ -1488,7 +2180,7 @@ async def rebuild_audio_index():
         )
 
     try:
-        result = audio_manager.rebuild_index()
+        result = await run_in_threadpool(audio_manager.rebuild_index)
         return result
     except Exception as e:
         raise HTTPException(
@@ -1496,7 +2188,7 @@ async def rebuild_audio_index():
         )
 
 
-@app.delete("/api/audio/clear")
+@api_router.delete("/audio/clear")
 async def clear_audio_index():
     """Limpiar todo el índice de Audio"""
     global audio_manager
@@ -1507,7 +2199,7 @@ async def clear_audio_index():
         )
 
     try:
-        result = audio_manager.clear_all()
+        result = await run_in_threadpool(audio_manager.clear_all)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error limpiando índice: {str(e)}")
@@ -1516,27 +2208,18 @@ async def clear_audio_index():
 # ==================== FIN ENDPOINTS AUDIO ====================
 
 
-# Montar archivos estáticos del build de React
-static_dir = os.path.join(os.path.dirname(__file__), "static")
-dist_dir = os.path.join(static_dir, "dist")
-
-# Servir el build de React
-if os.path.exists(dist_dir):
-    app.mount(
-        "/assets",
-        StaticFiles(directory=os.path.join(dist_dir, "assets")),
-        name="assets",
-    )
-
+app.include_router(api_router)
 
-@app.get("/")
-async def read_root():
-    """Servir la aplicación React"""
-    dist_index = os.path.join(os.path.dirname(__file__), "static", "dist", "index.html")
+# Montar al final: las rutas /api incluidas arriba tienen prioridad y todo
+# lo demás lo resuelve un único StaticFiles (index.html, /assets y fallback
+# del SPA)
+if os.path.exists(DIST_DIR):
+    app.mount("/", SPAStaticFiles(directory=DIST_DIR, html=True), name="spa")
+else:
 
-    if os.path.exists(dist_index):
-        return FileResponse(dist_index)
-    else:
+    @app.get("/")
+    async def read_root():
+        """Aviso cuando el build de React no existe"""
         return JSONResponse(
             status_code=404,
             content={
@@ -1545,27 +2228,59 @@ async def read_root():
         )
 
 
-# Catch-all route para React Router (debe ir al final)
-@app.get("/{full_path:path}")
-async def serve_react_app(full_path: str):
-    """Servir la aplicación React para todas las rutas no API"""
-    # Si es una ruta API, dejar que FastAPI maneje el 404
-    if full_path.startswith("api/"):
-        raise HTTPException(status_code=404, detail="API endpoint not found")
+@app.on_event("startup")
+async def start_log_listener():
+    _log_listener.start()
+
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    _log_listener.stop()
+
+
+@app.on_event("shutdown")
+async def close_database_files():
+    """Cierra los archivos de índice que quedan abiertos (B+ Tree)"""
+    with _sql_lock:
+        database_adapter.close()
+
 
-    # Servir el index.html de React para client-side routing
-    dist_index = os.path.join(os.path.dirname(__file__), "static", "dist", "index.html")
-    if os.path.exists(dist_index):
-        return FileResponse(dist_index)
+@app.on_event("shutdown")
+async def stop_tokenize_pool():
+    if _tokenize_pool is not None:
+        _tokenize_pool.shutdown(cancel_futures=True)
 
-    raise HTTPException(status_code=404, detail="Route not found")
+
+@app.on_event("startup")
+async def sweep_deleted_collections():
+    """Termina de borrar las colecciones BOW que quedaron a medio eliminar"""
+    for item in os.listdir(BOW_DATA_DIR):
+        if BOW_TRASH_MARKER in item:
+            _remove_in_background(os.path.join(BOW_DATA_DIR, item))
+
+
+@app.on_event("startup")
+async def log_event_loop():
+    """Registra qué event loop usa el servidor (uvloop esperado)"""
+    log.info("Event loop: %s", asyncio.get_running_loop().__class__.__module__)
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """Más hilos para los endpoints síncronos (SQL, CSV, SIFT); anyio usa 40"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
 
 
 # Manejar errores 404 para rutas API no encontradas
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
+    detail = getattr(exc, "detail", None)
+    if not detail or detail == "Not Found":
+        return Response(
+            content=ERR_404_BYTES, status_code=404, media_type="application/json"
+        )
     return JSONResponse(
-        status_code=404, content={"error": "Endpoint no encontrado", "detail": str(exc)}
+        status_code=404, content={"error": "Endpoint no encontrado", "detail": detail}
     )
 
 
@@ -1576,4 +2291,34 @@ if __name__ == "__main__":
     print("📖 Documentación disponible en: http://localhost:8000/docs")
     print("🌐 Frontend disponible en: http://localhost:8000/")
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    # DEV=1 activa el autoreload; WORKERS>1 solo si el estado en memoria
+    # (motores SIFT/BOW/audio, historial SQL) no necesita compartirse
+    dev = bool(os.getenv("DEV"))
+    workers = int(os.getenv("WORKERS", "1"))
+
+    # SERVER=granian (pip install granian) sirve las imágenes con pathsend
+    if os.getenv("SERVER") == "granian" and not dev:
+        from granian import Granian
+        from granian.constants import Interfaces
+
+        Granian(
+            "main:app",
+            address="0.0.0.0",
+            port=8000,
+            interface=Interfaces.ASGI,
+            workers=workers,
+        ).serve()
+        sys.exit(0)
+
+    fast_io = {} if sys.platform == "win32" else {"loop": "uvloop", "http": "httptools"}
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=None if dev else workers,
+        reload=dev,
+        backlog=2048,
+        limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", "1000")),
+        log_level="info",
+        **fast_io,
+    )
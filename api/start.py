@@ -32,20 +32,31 @@ def start_server():
     print("🌐 Interfaz Web: http://localhost:8000/")
     print("⏹️  Presiona Ctrl+C para detener\n")
 
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "main:app",
+        "--host",
+        "0.0.0.0",
+        "--port",
+        "8000",
+    ]
+    if os.getenv("DEV"):
+        cmd.append("--reload")
+    else:
+        cmd += ["--workers", os.getenv("WORKERS", "1")]
+    cmd += [
+        "--backlog",
+        "2048",
+        "--limit-concurrency",
+        os.getenv("LIMIT_CONCURRENCY", "1000"),
+    ]
+    if sys.platform != "win32":
+        cmd += ["--loop", "uvloop", "--http", "httptools"]
+
     try:
-        subprocess.run(
-            [
-                sys.executable,
-                "-m",
-                "uvicorn",
-                "main:app",
-                "--host",
-                "0.0.0.0",
-                "--port",
-                "8000",
-                "--reload",
-            ]
-        )
+        subprocess.run(cmd)
     except KeyboardInterrupt:
         print("\n⏹️  Servidor detenido por el usuario")
     except Exception as e:
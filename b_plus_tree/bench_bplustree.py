@@ -0,0 +1,252 @@
+# bench_bplustree.py
+# Benchmark del B+ Tree: inserción, búsqueda puntual, búsqueda por rango y
+# estructura final sobre un dataset JSON (lista de filas con "id")
+# Uso: python bench_bplustree.py --dataset small|large
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bplustree import BPlusTree
+
+# orjson (C/Rust) decodifica varias veces más rápido que json; ujson como
+# segunda opción y json de la librería estándar si no hay ninguno
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+
+        _loads = ujson.loads
+    except ImportError:
+        _loads = json.loads
+
+# ijson (opcional) recorre el arreglo JSON fila por fila sin cargarlo entero
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Filas generadas si el archivo del dataset no existe
+DATASET_SIZES = {"small": 1_000, "large": 100_000}
+
+
+def banner(title):
+    print("\n" + "=" * 70)
+    print(title)
+    print("=" * 70)
+
+
+def load_dataset(fn):
+    with open(fn, "rb") as f:
+        return _loads(f.read())
+
+
+def iter_dataset(fn):
+    """Genera las filas del dataset; con ijson, sin materializar la lista"""
+    if ijson is None:
+        yield from load_dataset(fn)
+        return
+    with open(fn, "rb") as f:
+        yield from ijson.items(f, "item")
+
+
+def make_dataset(fn, n, seed=42):
+    """Genera n filas con ids únicos en orden aleatorio"""
+    rng = random.Random(seed)
+    ids = rng.sample(range(n * 10), n)
+    rows = [
+        {"id": k, "nombre": f"item_{k}", "precio": rng.randint(1, 1000)} for k in ids
+    ]
+    os.makedirs(os.path.dirname(fn) or ".", exist_ok=True)
+    with open(fn, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+
+
+def ensure_clean_dir(dirpath):
+    # rmtree borra en C, sin un Path ni un stat por archivo
+    shutil.rmtree(dirpath, ignore_errors=True)
+    Path(dirpath).mkdir(parents=True, exist_ok=True)
+
+
+def report(label, samples_ns):
+    """Imprime la medición en ms; con varias repeticiones, mínimo y mediana"""
+    ms = [ns / 1e6 for ns in samples_ns]
+    if len(ms) == 1:
+        print(f"{label} en {ms[0]:.3f} ms")
+    else:
+        print(
+            f"{label}: min {min(ms):.3f} ms, mediana {statistics.median(ms):.3f} ms "
+            f"({len(ms)} repeticiones)"
+        )
+
+
+def drop_page_cache(dirpath):
+    """Pide al SO que descarte de su caché las páginas de los archivos de
+    ``dirpath`` (deben estar ya sincronizados a disco)."""
+    if not hasattr(os, "posix_fadvise"):
+        print("posix_fadvise no disponible: --cold no tiene efecto")
+        return
+    for entry in os.scandir(dirpath):
+        if entry.is_file(follow_symlinks=False):
+            fd = os.open(entry.path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark del B+ Tree")
+    ap.add_argument("--dataset", default="small", choices=sorted(DATASET_SIZES))
+    ap.add_argument("--data-dir", default=os.path.join("data", "bplustree_test"))
+    ap.add_argument("--index-name", default="bench")
+    ap.add_argument("--order", type=int, default=None)
+    ap.add_argument(
+        "--bulk-load",
+        action="store_true",
+        help="ordenar las filas y construir el árbol con bulk_load",
+    )
+    ap.add_argument(
+        "--cold",
+        action="store_true",
+        help="vaciar la caché de páginas del índice antes de las búsquedas",
+    )
+    ap.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="repeticiones de cada bloque medido (se informa mínimo y mediana)",
+    )
+    ap.add_argument(
+        "--verbose",
+        action="store_true",
+        help="imprimir los primeros niveles del árbol al final",
+    )
+    args = ap.parse_args()
+    if args.repeat < 1:
+        ap.error("--repeat debe ser al menos 1")
+    # Todas las referencias comparten el mismo objeto str (internado)
+    args.dataset = sys.intern(args.dataset)
+    args.index_name = sys.intern(args.index_name)
+
+    fn = os.path.join(args.data_dir, f"{args.dataset}.json")
+    if not os.path.exists(fn):
+        make_dataset(fn, DATASET_SIZES[args.dataset])
+
+    # Una sola pasada sobre las filas: solo se conservan las claves, en un
+    # arreglo int64 (min/max/filtros en C). El árbol recibe enteros de Python
+    # (key_list) para no guardar escalares de NumPy
+    t0 = time.perf_counter_ns()
+    keys = np.fromiter((r["id"] for r in iter_dataset(fn)), dtype=np.int64)
+    t1 = time.perf_counter_ns()
+    print(f"Dataset '{args.dataset}': {len(keys)} filas en {(t1 - t0) / 1e6:.3f} ms")
+
+    storage = os.path.join(args.data_dir, "bplustree_nodes")
+    kmin, kmax = int(keys.min()), int(keys.max())
+    key_list = keys.tolist()
+
+    def open_tree():
+        return BPlusTree(
+            order=args.order, storage_path=storage, index_name=args.index_name
+        )
+
+    def reopen_cold(tree):
+        # Búsquedas en frío: índice en disco, sin caché del SO ni del árbol
+        tree.flush()
+        tree.close()
+        drop_page_cache(storage)
+        return open_tree()
+
+    # ---------------- Inserción ----------------
+    use_bulk = args.bulk_load and hasattr(BPlusTree, "bulk_load")
+    banner("INSERCIÓN" + (" (bulk load)" if use_bulk else ""))
+    # Referencias armadas antes de medir: el tiempo es solo el del árbol.
+    # Tuplas en lugar de dicts: sin hashing de claves por fila
+    refs = [(args.dataset, k) for k in key_list]
+    tree = None
+    samples = []
+    for _ in range(args.repeat):
+        # Cada repetición parte de un índice vacío
+        if tree is not None:
+            tree.close()
+        ensure_clean_dir(storage)
+        tree = open_tree()
+        t0 = time.perf_counter_ns()
+        if use_bulk:
+            tree.bulk_load(sorted(zip(key_list, refs)))
+        else:
+            for k, ref in zip(key_list, refs):
+                tree.add(k, ref)
+        samples.append(time.perf_counter_ns() - t0)
+    op = "bulk_load()" if use_bulk else "add() x"
+    report(f"{op} {len(keys)}", samples)
+
+    if args.cold:
+        tree = reopen_cold(tree)
+        print("Caché de páginas descartada (--cold)")
+
+    # ---------------- Búsqueda puntual ----------------
+    banner("BÚSQUEDA PUNTUAL")
+    present = set(key_list)
+    probe = sorted(
+        set([key_list[0], key_list[len(keys) // 2], key_list[-1], kmax // 2, kmin + 1])
+    )
+    # Un solo descenso para todas las claves si el árbol lo soporta
+    search_many = getattr(tree, "search_many", None)
+    if search_many is not None:
+        found = search_many(probe)
+    else:
+        found = [tree.search(k) for k in probe]
+    for k, ref in zip(probe, found):
+        print(f"search({k}) -> {ref}")
+        assert ref == ((args.dataset, k) if k in present else None)
+
+    # ---------------- Rango ----------------
+    a = kmin
+    b = a + (kmax - a) // 10
+    banner(f"BÚSQUEDA POR RANGO [{a}, {b}]")
+    samples = []
+    for _ in range(args.repeat):
+        if args.cold:
+            tree = reopen_cold(tree)
+        t2 = time.perf_counter_ns()
+        res = tree.range_search(a, b)
+        samples.append(time.perf_counter_ns() - t2)
+    report(f"range_search({a}, {b}) -> {len(res)} registros", samples)
+    assert [k for k, _ in res] == np.sort(keys[(keys >= a) & (keys <= b)]).tolist()
+
+    # Misma consulta con los IDs de hoja tomados de los nodos internos y
+    # lectura anticipada de las siguientes 8 páginas
+    samples = []
+    for _ in range(args.repeat):
+        if args.cold:
+            tree = reopen_cold(tree)
+        t2 = time.perf_counter_ns()
+        res_pf = tree.range_search_prefetch(a, b, lookahead=8)
+        samples.append(time.perf_counter_ns() - t2)
+    report(f"range_search_prefetch({a}, {b}) -> {len(res_pf)} registros", samples)
+    assert res_pf == res
+
+    # ---------------- Estructura ----------------
+    if args.verbose:
+        banner("ESTRUCTURA DEL ÁRBOL (3 niveles)")
+        tree.print_tree(max_depth=3, file=sys.stdout)
+    tree.close()
+
+    banner("OK — Todas las pruebas pasaron")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
 import json
 import os
+import pickle
 import struct
+import sys
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from itertools import islice
+
+
+def _even_chunks(items, cap):
+    """Parte ``items`` en ceil(n / cap) tramos consecutivos de tamaños parejos."""
+    count = max(-(-len(items) // cap), 1)
+    base, extra = divmod(len(items), count)
+    start = 0
+    for i in range(count):
+        end = start + base + (1 if i < extra else 0)
+        yield items[start:end]
+        start = end
 
 
 class BPlusTreeNode:
+    """Nodo del árbol. En las hojas, ``keys`` y ``refs`` son listas paralelas
+    (clave ordenada -> referencia al registro) para poder usar ``bisect``."""
+
     BLOCK_FACTOR = 3
 
     def __init__(self, is_leaf=False):
         self.is_leaf = is_leaf
         self.keys = []
         self.children = []
+        self.refs = []
         self.next_leaf = -1
         self.size = 0
 
@@ -21,6 +41,7 @@ class BPlusTreeNode:
             "is_leaf": self.is_leaf,
             "keys": self.keys,
             "children": self.children,
+            "refs": self.refs,
             "next_leaf": self.next_leaf,
             "size": self.size,
         }
@@ -30,6 +51,12 @@ class BPlusTreeNode:
         node = BPlusTreeNode(is_leaf=data["is_leaf"])
         node.keys = data["keys"]
         node.children = data["children"]
+        if node.is_leaf and "refs" not in data:
+            # Formato anterior: hojas con pares (clave, referencia)
+            node.keys = [k for k, _ in data["keys"]]
+            node.refs = [ref for _, ref in data["keys"]]
+        else:
+            node.refs = data.get("refs", [])
         raw_next = data.get("next_leaf", -1)
         node.next_leaf = -1 if raw_next is None else raw_next
         node.size = data.get("size", len(data["keys"]))
@@ -37,66 +64,314 @@ class BPlusTreeNode:
 
 
 class BPlusFile:
-    HEADER_SIZE = 4
-
-    def __init__(self, storage_path="bplustree_nodes", index_name="default"):
+    """Archivo de índice con páginas de tamaño fijo.
+
+    Cabecera: (root_id, next_node_id). El nodo ``node_id`` vive en la página
+    ``HEADER_SIZE + node_id * PAGE_SIZE``: una cabecera binaria con is_leaf,
+    next_leaf, size y la longitud del contenido (claves e hijos, o claves y
+    referencias en las hojas, serializadas con pickle). Si el
+    contenido no cabe en la página se guarda en ``{index}_overflow.dat`` y la
+    página apunta a él. Cada nodo reserva ahí un espacio de tamaño potencia de
+    dos y lo reutiliza mientras su contenido quepa, así reescribir un nodo
+    grande no hace crecer el archivo.
+
+    Los nodos leídos o escritos quedan en una caché LRU de ``cache_size``
+    entradas. La caché entrega el mismo objeto en cada lectura, así que quien
+    modifique un nodo debe escribirlo con ``write_node`` (como ya hace el árbol).
+
+    Ambos archivos se abren una sola vez y se reutilizan en cada operación;
+    ``close()`` los cierra (se vuelven a abrir solos si se sigue usando).
+    """
+
+    HEADER_FORMAT = struct.Struct("<ii")
+    HEADER_SIZE = HEADER_FORMAT.size
+    # Posición de next_node_id dentro de la cabecera
+    NEXT_ID_FORMAT = struct.Struct("<i")
+    NEXT_ID_OFFSET = HEADER_SIZE - NEXT_ID_FORMAT.size
+    PAGE_SIZE = 4096
+    # is_leaf, next_leaf, size, longitud del contenido, offset de overflow (-1: en la página)
+    PAGE_HEADER = struct.Struct("<BiIIq")
+    PAGE_CAPACITY = PAGE_SIZE - PAGE_HEADER.size
+
+    def __init__(
+        self, storage_path="bplustree_nodes", index_name="default", cache_size=1024
+    ):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._fh = None
+        self._ovf = None
+        # node_id -> (offset, capacidad) de su espacio en el archivo de overflow
+        self._overflow_slots = {}
         self.storage_path = storage_path
         self.index_name = index_name
         self.filename = os.path.join(storage_path, f"{index_name}_index.dat")
+        self.overflow_filename = os.path.join(storage_path, f"{index_name}_overflow.dat")
         os.makedirs(storage_path, exist_ok=True)
 
         if not os.path.exists(self.filename):
             self.initialize_file()
+        elif os.path.getsize(self.filename) == 4:
+            self._migrate_json_nodes()
+        # Siguiente ID libre en memoria; se persiste en la cabecera al escribir.
+        # _stored_next_id es el valor que hay en disco
+        self._next_id = self._stored_next_id = self._read_header()[1]
+
+    def _file(self):
+        if self._fh is None:
+            self._fh = open(self.filename, "r+b")
+        return self._fh
+
+    def _overflow_file(self):
+        # Lectura/escritura con seek: los espacios de overflow se reescriben
+        if self._ovf is None:
+            mode = "r+b" if os.path.exists(self.overflow_filename) else "w+b"
+            self._ovf = open(self.overflow_filename, mode)
+        return self._ovf
+
+    def flush(self):
+        """Vuelca los archivos abiertos hasta el disco (flush + fsync)."""
+        for handle in (self._fh, self._ovf):
+            if handle is not None:
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def close(self):
+        for handle in (self._fh, self._ovf):
+            if handle is not None:
+                handle.close()
+        self._fh = None
+        self._ovf = None
 
     def initialize_file(self):
+        self.close()
+        self._cache.clear()
+        self._overflow_slots.clear()
+        self._next_id = self._stored_next_id = 0
         with open(self.filename, "wb") as file:
-            header = -1
-            file.write(struct.pack("i", header))
+            file.write(self.HEADER_FORMAT.pack(-1, 0))
+        if os.path.exists(self.overflow_filename):
+            os.remove(self.overflow_filename)
+
+    def _read_header(self):
+        f = self._file()
+        f.seek(0)
+        data = f.read(self.HEADER_SIZE)
+        if len(data) < self.HEADER_SIZE:
+            return -1, 0
+        return self.HEADER_FORMAT.unpack(data)
+
+    def _write_header(self, root_position, next_node_id):
+        f = self._file()
+        f.seek(0)
+        f.write(self.HEADER_FORMAT.pack(root_position, next_node_id))
+        f.flush()
+        self._stored_next_id = next_node_id
 
     def get_header(self):
-        with open(self.filename, "rb") as file:
-            file.seek(0)
-            data = file.read(self.HEADER_SIZE)
-            if not data:
-                return -1
-            root_position = struct.unpack("i", data)[0]
-            return root_position
+        return self._read_header()[0]
 
     def write_header(self, root_position):
-        with open(self.filename, "rb+") as file:
-            file.seek(0)
-            file.write(struct.pack("i", root_position))
+        self._write_header(root_position, self._next_id)
+
+    def allocate_id(self):
+        """Reserva un ID de nodo sin escribir nada en disco."""
+        node_id = self._next_id
+        self._next_id += 1
+        return node_id
 
     def read_node(self, node_id):
         if node_id == -1:
             raise Exception(f"Invalid node_id: {node_id}")
-        path = os.path.join(self.storage_path, f"node_{node_id}.json")
-        if not os.path.exists(path):
-            raise Exception(f"Node file not found: {path}")
-        with open(path, "r") as f:
-            data = json.load(f)
-            if data.get("next_leaf", -1) is None:
-                data["next_leaf"] = -1
-            return BPlusTreeNode.from_dict(data)
+        node = self._cache.get(node_id)
+        if node is not None:
+            self._cache.move_to_end(node_id)
+            return node
+
+        return self._read_page(self._file(), node_id)
+
+    def _read_page(self, f, node_id, cache=True):
+        f.seek(self.HEADER_SIZE + node_id * self.PAGE_SIZE)
+        page = f.read(self.PAGE_SIZE)
+        if len(page) < self.PAGE_HEADER.size:
+            raise Exception(f"Node not found: {node_id}")
+
+        is_leaf, next_leaf, size, length, overflow = self.PAGE_HEADER.unpack_from(page)
+        if overflow < 0:
+            payload = page[self.PAGE_HEADER.size : self.PAGE_HEADER.size + length]
+        else:
+            # Espacio conocido al menos hasta length (la capacidad real puede
+            # ser mayor si se reservó en esta sesión)
+            if node_id not in self._overflow_slots:
+                self._overflow_slots[node_id] = (overflow, length)
+            ovf = self._overflow_file()
+            ovf.seek(overflow)
+            payload = ovf.read(length)
+
+        keys, values = pickle.loads(payload)
+        node = BPlusTreeNode(is_leaf=bool(is_leaf))
+        node.keys = keys
+        if node.is_leaf:
+            node.refs = values
+        else:
+            node.children = values
+        node.next_leaf = next_leaf
+        node.size = size
+        if cache:
+            self._cache_put(node_id, node)
+        return node
+
+    def _cache_put(self, node_id, node):
+        self._cache[node_id] = node
+        self._cache.move_to_end(node_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
 
     def write_node(self, node, node_id=None):
         if node_id is None:
-            node_id = self._get_next_node_id()
-        path = os.path.join(self.storage_path, f"node_{node_id}.json")
-        with open(path, "w") as f:
-            json.dump(node.to_dict(), f)
+            node_id = self.allocate_id()
+        self.write_nodes({node_id: node})
         return node_id
 
+    def write_nodes(self, nodes):
+        """Escribe varios nodos ``{node_id: nodo}`` con una sola apertura del
+        archivo y una sola actualización de la cabecera."""
+        f = self._file()
+        for node_id, node in nodes.items():
+            self._write_page(f, node_id, node)
+        self._next_id = max(self._next_id, max(nodes, default=-1) + 1)
+        # Solo cambia next_node_id; la raíz se escribe con write_header
+        if self._stored_next_id != self._next_id:
+            f.seek(self.NEXT_ID_OFFSET)
+            f.write(self.NEXT_ID_FORMAT.pack(self._next_id))
+            self._stored_next_id = self._next_id
+        if self._ovf is not None:
+            self._ovf.flush()
+        f.flush()
+
+    def _write_page(self, f, node_id, node):
+        values = node.refs if node.is_leaf else node.children
+        payload = pickle.dumps(
+            (node.keys, values), protocol=pickle.HIGHEST_PROTOCOL
+        )
+        overflow = -1
+        if len(payload) > self.PAGE_CAPACITY:
+            # Nodos con registros grandes: el contenido va al archivo de overflow
+            overflow = self._write_overflow(node_id, payload)
+
+        header = self.PAGE_HEADER.pack(
+            node.is_leaf,
+            -1 if node.next_leaf is None else node.next_leaf,
+            node.size,
+            len(payload),
+            overflow,
+        )
+        f.seek(self.HEADER_SIZE + node_id * self.PAGE_SIZE)
+        f.write(header)
+        if overflow < 0:
+            f.write(payload)
+        self._cache_put(node_id, node)
+
+    def _overflow_slot(self, node_id):
+        """(offset, capacidad) del espacio de overflow de ``node_id``, o None.
+        Si el nodo no se leyó ni escribió en esta sesión se mira su página."""
+        slot = self._overflow_slots.get(node_id)
+        if slot is None:
+            f = self._file()
+            f.seek(self.HEADER_SIZE + node_id * self.PAGE_SIZE)
+            header = f.read(self.PAGE_HEADER.size)
+            if len(header) == self.PAGE_HEADER.size:
+                _, _, _, length, overflow = self.PAGE_HEADER.unpack(header)
+                if overflow >= 0:
+                    slot = (overflow, length)
+        return slot
+
+    def _write_overflow(self, node_id, payload):
+        """Escribe ``payload`` en el espacio de overflow del nodo; si no cabe,
+        reserva uno nuevo al final (potencia de dos >= len(payload))."""
+        ovf = self._overflow_file()
+        slot = self._overflow_slot(node_id)
+        if slot is None or slot[1] < len(payload):
+            capacity = 1 << (len(payload) - 1).bit_length()
+            offset = ovf.seek(0, os.SEEK_END)
+            slot = (offset, capacity)
+            # Extiende el archivo hasta el final del espacio reservado
+            ovf.truncate(offset + capacity)
+        self._overflow_slots[node_id] = slot
+        ovf.seek(slot[0])
+        ovf.write(payload)
+        return slot[0]
+
+    def prefetch(self, node_ids):
+        """Pide al SO que lea por adelantado las páginas de ``node_ids``
+        (posix_fadvise WILLNEED, una llamada por tramo de IDs consecutivos);
+        no hace nada donde no está disponible."""
+        if not hasattr(os, "posix_fadvise"):
+            return
+        fd = self._file().fileno()
+        runs = []
+        for node_id in sorted(node_ids):
+            if runs and runs[-1][1] == node_id:
+                runs[-1][1] = node_id + 1
+            else:
+                runs.append([node_id, node_id + 1])
+        for first, stop in runs:
+            os.posix_fadvise(
+                fd,
+                self.HEADER_SIZE + first * self.PAGE_SIZE,
+                (stop - first) * self.PAGE_SIZE,
+                os.POSIX_FADV_WILLNEED,
+            )
+
+    def iter_leaves(self, leaf_ids, lookahead=8):
+        """Lee las hojas de ``leaf_ids`` en orden, en tandas de ``lookahead``:
+        la tanda siguiente se pide al SO antes de leer la actual. Igual que
+        ``iter_leaves_from``, no agrega a la caché las hojas que lee."""
+        leaf_ids = iter(leaf_ids)
+        batch = list(islice(leaf_ids, lookahead))
+        self.prefetch(batch)
+        while batch:
+            upcoming = list(islice(leaf_ids, lookahead))
+            self.prefetch(upcoming)
+            for node_id in batch:
+                node = self._cache.get(node_id)
+                if node is None:
+                    node = self._read_page(self._file(), node_id, cache=False)
+                yield node
+            batch = upcoming
+
+    def iter_leaves_from(self, start_id):
+        """Recorre la cadena de hojas desde ``start_id``. Usa las hojas que ya
+        están en caché, pero no agrega las demás para que un recorrido completo
+        no desplace los nodos internos."""
+        current_id = start_id
+        while current_id != -1:
+            node = self._cache.get(current_id)
+            if node is None:
+                # _read_page hace seek antes de leer: el archivo compartido se
+                # puede usar entre un yield y el siguiente
+                node = self._read_page(self._file(), current_id, cache=False)
+            yield node
+            current_id = node.next_leaf
+
     def _get_next_node_id(self):
-        existing_files = [
-            f
-            for f in os.listdir(self.storage_path)
-            if f.startswith("node_") and f.endswith(".json")
-        ]
-        if not existing_files:
-            return 0
-        ids = [int(f.split("_")[1].split(".")[0]) for f in existing_files]
-        return max(ids) + 1
+        return self._next_id
+
+    def _migrate_json_nodes(self):
+        """Convierte un índice del formato anterior (un node_{id}.json por nodo)."""
+        with open(self.filename, "rb") as file:
+            root_id = struct.unpack("i", file.read(4))[0]
+        legacy = {}
+        for name in os.listdir(self.storage_path):
+            if name.startswith("node_") and name.endswith(".json"):
+                with open(os.path.join(self.storage_path, name), "r") as f:
+                    legacy[int(name[5:-5])] = BPlusTreeNode.from_dict(json.load(f))
+
+        self.initialize_file()
+        self._write_header(root_id, 0)
+        for node_id, node in legacy.items():
+            self.write_node(node, node_id)
+        for node_id in legacy:
+            os.remove(os.path.join(self.storage_path, f"node_{node_id}.json"))
 
 
 class BPlusTree:
@@ -122,17 +397,49 @@ class BPlusTree:
         node = self.index_file.read_node(node_id)
 
         if node.is_leaf:
-            for k, ref in node.keys:
-                if k == key:
-                    return ref
+            i = bisect_left(node.keys, key)
+            if i < node.size and node.keys[i] == key:
+                return node.refs[i]
             return None
 
-        i = 0
-        # Avanzar mientras la clave sea mayor o igual al separador
-        while i < node.size and key >= node.keys[i]:
-            i += 1
+        # Hijo derecho del último separador <= clave
+        i = bisect_right(node.keys, key)
         return self._search_aux(node.children[i], key)
 
+    def search_many(self, keys):
+        """Busca varias claves con un solo descenso: las consultas se ordenan y
+        cada nodo interno se lee una vez para todas las que pasan por él.
+        Devuelve los resultados en el orden de ``keys`` (como ``search``)."""
+        results = [None] * len(keys)
+        if self.root_id == -1 or not keys:
+            return results
+
+        queries = sorted((key, i) for i, key in enumerate(keys))
+        stack = [(self.root_id, queries)]
+        while stack:
+            node_id, group = stack.pop()
+            node = self.index_file.read_node(node_id)
+
+            if node.is_leaf:
+                for key, i in group:
+                    j = bisect_left(node.keys, key)
+                    if j < node.size and node.keys[j] == key:
+                        results[i] = node.refs[j]
+                continue
+
+            # Consultas consecutivas que bajan al mismo hijo van juntas
+            start = 0
+            while start < len(group):
+                child = bisect_right(node.keys, group[start][0])
+                end = start + 1
+                while end < len(group):
+                    if bisect_right(node.keys, group[end][0]) != child:
+                        break
+                    end += 1
+                stack.append((node.children[child], group[start:end]))
+                start = end
+        return results
+
     def range_search(self, start, end):
         if self.root_id == -1:
             return []
@@ -140,98 +447,195 @@ class BPlusTree:
         leaf_id = self._find_leaf_id(self.root_id, start)
         results = []
 
-        current_id = leaf_id
-        while current_id != -1:
-            current_node = self.index_file.read_node(current_id)
-            for k, ref in current_node.keys:
-                if start <= k <= end:
-                    results.append((k, ref))
-                elif k > end:
-                    return results
-            current_id = current_node.next_leaf
+        for leaf in self.index_file.iter_leaves_from(leaf_id):
+            # Primer candidato >= start y último <= end, con bisect
+            lo = bisect_left(leaf.keys, start)
+            hi = bisect_right(leaf.keys, end)
+            results.extend(zip(leaf.keys[lo:hi], leaf.refs[lo:hi]))
+            if hi < leaf.size:
+                break
         return results
 
+    def range_search_prefetch(self, start, end, lookahead=8):
+        """Igual que ``range_search``, pero obtiene los IDs de las hojas del
+        rango desde los nodos internos (sin leer las hojas) y pide al SO las
+        ``lookahead`` siguientes mientras recorre la actual."""
+        if self.root_id == -1:
+            return []
+
+        results = []
+        leaf_ids = self._leaf_ids_between(start, end)
+        for leaf in self.index_file.iter_leaves(leaf_ids, lookahead):
+            lo = bisect_left(leaf.keys, start)
+            hi = bisect_right(leaf.keys, end)
+            results.extend(zip(leaf.keys[lo:hi], leaf.refs[lo:hi]))
+            if hi < leaf.size:
+                break
+        return results
+
+    def _leaf_ids_between(self, start, end):
+        """Genera en orden los IDs de las hojas que pueden tener claves en
+        [start, end], recorriendo solo nodos internos."""
+        # Altura: nivel de los nodos cuyos hijos son hojas
+        height = 0
+        node = self.index_file.read_node(self.root_id)
+        while not node.is_leaf:
+            node = self.index_file.read_node(node.children[0])
+            height += 1
+        if height == 0:
+            yield self.root_id
+            return
+
+        stack = [(self.root_id, 1)]
+        while stack:
+            node_id, depth = stack.pop()
+            node = self.index_file.read_node(node_id)
+            # Hijos que pueden contener claves del rango, como en _find_leaf_id
+            lo = bisect_right(node.keys, start)
+            hi = bisect_right(node.keys, end)
+            children = node.children[lo : hi + 1]
+            if depth == height:
+                yield from children
+            else:
+                stack.extend((child, depth + 1) for child in reversed(children))
+
     def add(self, key, record_ref=None):
-        split, new_key, new_pointer = self._insert_aux(self.root_id, key, record_ref)
+        # Descenso iterativo: se guarda el camino (nodo interno, posición del hijo)
+        path = []
+        node_id = self.root_id
+        node = self.index_file.read_node(node_id)
+        while not node.is_leaf:
+            # Seleccionar el hijo correcto: a la derecha de los separadores <= clave
+            i = bisect_right(node.keys, key)
+            path.append((node_id, node, i))
+            node_id = node.children[i]
+            node = self.index_file.read_node(node_id)
+
+        # Nodos modificados durante la inserción: se escriben una sola vez al final
+        dirty = {}
+        split = self._insert_leaf(node_id, node, key, record_ref, dirty)
 
-        if split:
+        # Propagar los splits hacia arriba mientras haga falta
+        while split is not None and path:
+            node_id, node, i = path.pop()
+            split = self._insert_internal(node_id, node, i, split, dirty)
+
+        if split is not None:
+            new_key, new_pointer = split
             new_root = BPlusTreeNode(is_leaf=False)
             new_root.keys = [new_key]
             new_root.children = [self.root_id, new_pointer]
             new_root.size = 1
 
-            self.root_id = self.index_file.write_node(new_root)
-            self.index_file.write_header(self.root_id)
+            self.root_id = self.index_file.allocate_id()
+            dirty[self.root_id] = new_root
 
-    def _insert_aux(self, node_id, key, pointer):
-        node = self.index_file.read_node(node_id)
+        self.index_file.write_nodes(dirty)
+        if split is not None:
+            self.index_file.write_header(self.root_id)
 
-        if node.is_leaf:
-            node.keys.append((key, pointer))
-            node.keys.sort(key=lambda x: x[0])
-            node.size = len(node.keys)
+    def bulk_load(self, pairs):
+        """Construye el árbol desde cero con pares (clave, ref) ya ordenados.
 
-            if not node.is_full():
-                self.index_file.write_node(node, node_id)
-                return False, None, -1
+        Reemplaza el contenido actual. Las hojas se escriben de izquierda a
+        derecha, enlazadas entre sí, y los niveles internos se arman de abajo
+        hacia arriba con la clave mínima de cada hijo como separador: no hay
+        un descenso desde la raíz por clave como en ``add``.
+        """
+        pairs = list(pairs)
+        self.index_file.initialize_file()
+        factor = BPlusTreeNode.BLOCK_FACTOR
+
+        # Hojas con hasta factor - 1 claves (una más provocaría un split)
+        chunks = list(_even_chunks(pairs, max(factor - 1, 1)))
+        first_id = self.index_file._next_id
+        nodes = {}
+        level = []  # (clave mínima, node_id) de cada nodo del nivel actual
+        for i, chunk in enumerate(chunks):
+            leaf = BPlusTreeNode(is_leaf=True)
+            leaf.keys = [k for k, _ in chunk]
+            leaf.refs = [ref for _, ref in chunk]
+            leaf.size = len(leaf.keys)
+            leaf_id = self.index_file.allocate_id()
+            leaf.next_leaf = first_id + i + 1 if i + 1 < len(chunks) else -1
+            nodes[leaf_id] = leaf
+            level.append((leaf.keys[0] if leaf.keys else None, leaf_id))
+        self.index_file.write_nodes(nodes)
+
+        # Niveles internos con hasta factor hijos, hasta que quede una raíz
+        while len(level) > 1:
+            nodes = {}
+            parents = []
+            for group in _even_chunks(level, factor):
+                node = BPlusTreeNode(is_leaf=False)
+                node.keys = [k for k, _ in group[1:]]
+                node.children = [child_id for _, child_id in group]
+                node.size = len(node.keys)
+                node_id = self.index_file.allocate_id()
+                nodes[node_id] = node
+                parents.append((group[0][0], node_id))
+            self.index_file.write_nodes(nodes)
+            level = parents
+
+        self.root_id = level[0][1]
+        self.index_file.write_header(self.root_id)
 
-            mid = node.size // 2
-            left_keys = node.keys[:mid]
-            right_keys = node.keys[mid:]
+    def _insert_leaf(self, node_id, node, key, pointer, dirty):
+        """Inserta en la hoja; devuelve (clave, id) del nuevo hermano si hubo split."""
+        i = bisect_right(node.keys, key)
+        node.keys.insert(i, key)
+        node.refs.insert(i, pointer)
+        node.size = len(node.keys)
 
-            new_node = BPlusTreeNode(is_leaf=True)
-            new_node.keys = right_keys
-            new_node.size = len(right_keys)
-            new_node.next_leaf = node.next_leaf
+        dirty[node_id] = node
+        if not node.is_full():
+            return None
 
-            new_node_id = self.index_file.write_node(new_node)
+        mid = node.size // 2
 
-            node.keys = left_keys
-            node.size = len(left_keys)
-            node.next_leaf = new_node_id
-            self.index_file.write_node(node, node_id)
+        new_node = BPlusTreeNode(is_leaf=True)
+        new_node.keys = node.keys[mid:]
+        new_node.refs = node.refs[mid:]
+        new_node.size = len(new_node.keys)
+        new_node.next_leaf = node.next_leaf
 
-            return True, new_node.keys[0][0], new_node_id
+        new_node_id = self.index_file.allocate_id()
+        dirty[new_node_id] = new_node
 
-        else:
-            i = 0
-            # Seleccionar el hijo correcto: avanzar mientras la clave sea mayor o igual
-            while i < node.size and key >= node.keys[i]:
-                i += 1
+        node.keys = node.keys[:mid]
+        node.refs = node.refs[:mid]
+        node.size = len(node.keys)
+        node.next_leaf = new_node_id
 
-            split, new_key, new_pointer = self._insert_aux(node.children[i], key, pointer)
+        return new_node.keys[0], new_node_id
 
-            if not split:
-                return False, None, -1
+    def _insert_internal(self, node_id, node, i, split, dirty):
+        """Agrega al nodo interno el separador que sube del hijo i."""
+        new_key, new_pointer = split
+        node.keys.insert(i, new_key)
+        node.children.insert(i + 1, new_pointer)
+        node.size += 1
+        dirty[node_id] = node
 
-            node.keys.insert(i, new_key)
-            node.children.insert(i + 1, new_pointer)
-            node.size += 1
-
-            if not node.is_full():
-                self.index_file.write_node(node, node_id)
-                return False, None, -1
+        if not node.is_full():
+            return None
 
-            mid = node.size // 2
-            up_key = node.keys[mid]
-            left_keys = node.keys[:mid]
-            right_keys = node.keys[mid + 1:]
-            left_children = node.children[: mid + 1]
-            right_children = node.children[mid + 1 :]
+        mid = node.size // 2
+        up_key = node.keys[mid]
 
-            new_node = BPlusTreeNode(is_leaf=False)
-            new_node.keys = right_keys
-            new_node.children = right_children
-            new_node.size = len(right_keys)
+        new_node = BPlusTreeNode(is_leaf=False)
+        new_node.keys = node.keys[mid + 1:]
+        new_node.children = node.children[mid + 1:]
+        new_node.size = len(new_node.keys)
 
-            new_node_id = self.index_file.write_node(new_node)
+        new_node_id = self.index_file.allocate_id()
+        dirty[new_node_id] = new_node
 
-            node.keys = left_keys
-            node.children = left_children
-            node.size = len(left_keys)
-            self.index_file.write_node(node, node_id)
+        node.keys = node.keys[:mid]
+        node.children = node.children[: mid + 1]
+        node.size = len(node.keys)
 
-            return True, up_key, new_node_id
+        return up_key, new_node_id
 
 
     def remove(self, key):
@@ -241,13 +645,14 @@ class BPlusTree:
         node = self.index_file.read_node(node_id)
 
         if node.is_leaf:
-            node.keys = [(k, ref) for k, ref in node.keys if k != key]
+            kept = [(k, ref) for k, ref in zip(node.keys, node.refs) if k != key]
+            node.keys = [k for k, _ in kept]
+            node.refs = [ref for _, ref in kept]
             node.size = len(node.keys)
             self.index_file.write_node(node, node_id)
         else:
-            i = 0
-            while i < node.size and node.keys[i] < key:
-                i += 1
+            # Mismo hijo que en search: la clave igual a un separador está a la derecha
+            i = bisect_right(node.keys, key)
             self._delete_aux(node.children[i], key)
 
     def delete(self, key):
@@ -260,14 +665,8 @@ class BPlusTree:
 
         leaf_id = self._find_first_leaf(self.root_id)
         results = []
-
-        current_id = leaf_id
-        while current_id != -1:
-            current_node = self.index_file.read_node(current_id)
-            for k, ref in current_node.keys:
-                results.append((k, ref))
-            current_id = current_node.next_leaf
-
+        for leaf in self.index_file.iter_leaves_from(leaf_id):
+            results.extend(zip(leaf.keys, leaf.refs))
         return results
 
     def _find_first_leaf(self, node_id):
@@ -285,13 +684,18 @@ class BPlusTree:
         if node.is_leaf:
             return node_id
 
-        i = 0
         # Para búsqueda en árbol: si la clave es >= separador, bajar a la derecha
-        while i < node.size and key >= node.keys[i]:
-            i += 1
+        i = bisect_right(node.keys, key)
         return self._find_leaf_id(node.children[i], key)
 
+    def flush(self):
+        self.index_file.flush()
+
+    def close(self):
+        self.index_file.close()
+
     def clear(self):
+        self.index_file.close()
         if os.path.exists(self.storage_path):
             for file in os.listdir(self.storage_path):
                 file_path = os.path.join(self.storage_path, file)
@@ -302,38 +706,46 @@ class BPlusTree:
         self.root_id = self.index_file.write_node(root, 0)
         self.index_file.write_header(self.root_id)
 
-    def print_tree(self):
+    def iter_levels(self):
+        """Recorrido BFS: genera (nivel, claves) de cada nodo, sin armar listas."""
         if self.root_id == -1:
-            print("Tree is empty.")
             return
 
-        queue = [(self.root_id, 0)]
-        current_level = 0
-
-        print(f"Level {current_level}: ", end="")
+        queue = deque([(self.root_id, 0)])
         while queue:
-            node_id, level = queue.pop(0)
+            node_id, level = queue.popleft()
             node = self.index_file.read_node(node_id)
-
-            if level != current_level:
-                current_level = level
-                print()
-                print(f"Level {current_level}: ", end="")
-
-            if node.is_leaf:
-                keys = [k for k, _ in node.keys]
-            else:
-                keys = node.keys
-            print(f" {keys}", end="  ")
+            yield level, node.keys
 
             if not node.is_leaf:
-                for child_id in node.children[: node.size + 1]:
-                    if child_id != -1:
-                        queue.append((child_id, level + 1))
-        print()
+                queue.extend(
+                    (child_id, level + 1)
+                    for child_id in node.children[: node.size + 1]
+                    if child_id != -1
+                )
+
+    def print_tree(self, max_depth=None, file=None):
+        """Imprime las claves por nivel, hasta ``max_depth`` niveles, con una
+        sola escritura en ``file`` (stdout por defecto)."""
+        file = sys.stdout if file is None else file
+        if self.root_id == -1:
+            file.write("Tree is empty.\n")
+            return
+
+        lines = []
+        for level, keys in self.iter_levels():
+            if max_depth is not None and level >= max_depth:
+                break
+            if level == len(lines):
+                lines.append([f"Level {level}: "])
+            lines[level].append(f" {keys}  ")
+        file.write("\n".join("".join(parts) for parts in lines) + "\n")
 
 
 if __name__ == "__main__":
+    # Detalle de cada inserción y estructura del árbol solo con -v
+    verbose = "-v" in sys.argv
+
     print("=" * 60)
     print("PRUEBAS DEL B+ TREE")
     print("=" * 60)
@@ -346,11 +758,16 @@ if __name__ == "__main__":
     keys = [10, 20, 5, 6, 12, 30, 7, 17, 3, 15, 25, 8]
     for key in keys:
         tree.add(key, f"record_{key}")
-        print(f"✓ Insertado: {key}")
+        if verbose:
+            print(f"✓ Insertado: {key}")
+    print(f"Insertados: {len(keys)}")
 
     print("\n2. ESTRUCTURA DEL ÁRBOL")
     print("-" * 60)
-    tree.print_tree()
+    if verbose:
+        tree.print_tree()
+    else:
+        print(f"Niveles: {max(level for level, _ in tree.iter_levels()) + 1}")
 
     print("\n3. BÚSQUEDA")
     print("-" * 60)
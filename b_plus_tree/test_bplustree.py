@@ -0,0 +1,264 @@
+import json
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+
+from bplustree import BPlusFile, BPlusTree, BPlusTreeNode
+
+
+class TestBPlusTree(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tree = self.open_tree()
+
+        # Claves únicas en orden aleatorio: fuerzan splits en hojas e internos
+        rng = random.Random(7)
+        self.keys = rng.sample(range(1000), 200)
+
+    def tearDown(self):
+        self.tree.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def open_tree(self):
+        return BPlusTree(storage_path=self.temp_dir, index_name="test")
+
+    def reopen(self):
+        self.tree.close()
+        self.tree = self.open_tree()
+
+    def insert_all(self):
+        for key in self.keys:
+            self.tree.add(key, f"ref_{key}")
+
+    def test_search_empty(self):
+        self.assertIsNone(self.tree.search(1))
+        self.assertEqual(self.tree.get_all(), [])
+
+    def test_add_and_search(self):
+        self.insert_all()
+
+        for key in self.keys:
+            self.assertEqual(self.tree.search(key), f"ref_{key}")
+        self.assertIsNone(self.tree.search(1000))
+        self.assertIsNone(self.tree.search(-1))
+
+    def test_get_all_sorted(self):
+        self.insert_all()
+
+        expected = [(k, f"ref_{k}") for k in sorted(self.keys)]
+        self.assertEqual(self.tree.get_all(), expected)
+
+    def test_search_many(self):
+        self.insert_all()
+
+        probe = [self.keys[5], 1000, self.keys[0], -1, self.keys[5]]
+        expected = [self.tree.search(k) for k in probe]
+        self.assertEqual(self.tree.search_many(probe), expected)
+        self.assertEqual(self.tree.search_many([]), [])
+
+    def test_range_search(self):
+        self.insert_all()
+
+        expected = [(k, f"ref_{k}") for k in sorted(self.keys) if 100 <= k <= 400]
+        self.assertEqual(self.tree.range_search(100, 400), expected)
+        self.assertEqual(self.tree.range_search_prefetch(100, 400), expected)
+        self.assertEqual(self.tree.range_search(2000, 3000), [])
+        self.assertEqual(self.tree.range_search_prefetch(2000, 3000), [])
+
+    def test_range_search_single_leaf(self):
+        self.tree.add(5, "a")
+        self.tree.add(3, "b")
+
+        self.assertEqual(self.tree.range_search(0, 10), [(3, "b"), (5, "a")])
+        self.assertEqual(self.tree.range_search_prefetch(4, 10), [(5, "a")])
+
+    def test_remove(self):
+        self.insert_all()
+        removed = set(self.keys[::3])
+
+        for key in removed:
+            self.tree.remove(key)
+
+        for key in self.keys:
+            expected = None if key in removed else f"ref_{key}"
+            self.assertEqual(self.tree.search(key), expected)
+        remaining = [k for k in sorted(self.keys) if k not in removed]
+        self.assertEqual([k for k, _ in self.tree.get_all()], remaining)
+
+    def test_remove_separator_key(self):
+        # Con BLOCK_FACTOR = 3, la tercera inserción parte la hoja y 2 sube
+        # como separador a la raíz
+        for key in (1, 2, 3):
+            self.tree.add(key, f"ref_{key}")
+        root = self.tree.index_file.read_node(self.tree.root_id)
+        self.assertFalse(root.is_leaf)
+        self.assertEqual(root.keys, [2])
+
+        self.tree.remove(2)
+
+        self.assertIsNone(self.tree.search(2))
+        self.assertEqual(self.tree.get_all(), [(1, "ref_1"), (3, "ref_3")])
+
+    def test_persistence(self):
+        self.insert_all()
+        self.reopen()
+
+        for key in self.keys:
+            self.assertEqual(self.tree.search(key), f"ref_{key}")
+        self.tree.add(5000, "ref_5000")
+        self.assertEqual(self.tree.search(5000), "ref_5000")
+        self.assertEqual(len(self.tree.get_all()), len(self.keys) + 1)
+
+    def test_bulk_load(self):
+        pairs = [(k, f"ref_{k}") for k in sorted(self.keys)]
+        self.tree.bulk_load(pairs)
+
+        self.assertEqual(self.tree.get_all(), pairs)
+        for key in self.keys:
+            self.assertEqual(self.tree.search(key), f"ref_{key}")
+        self.assertEqual(
+            self.tree.range_search_prefetch(100, 400),
+            [p for p in pairs if 100 <= p[0] <= 400],
+        )
+
+        # El árbol cargado acepta inserciones y sobrevive a reabrir el índice
+        self.tree.add(5000, "ref_5000")
+        self.reopen()
+        self.assertEqual(self.tree.get_all(), pairs + [(5000, "ref_5000")])
+
+    def test_bulk_load_replaces_content(self):
+        self.tree.add(1, "old")
+        self.tree.bulk_load([(2, "a"), (4, "b")])
+
+        self.assertIsNone(self.tree.search(1))
+        self.assertEqual(self.tree.get_all(), [(2, "a"), (4, "b")])
+
+    def test_bulk_load_empty(self):
+        self.tree.bulk_load([])
+
+        self.assertEqual(self.tree.get_all(), [])
+        self.tree.add(1, "a")
+        self.assertEqual(self.tree.search(1), "a")
+
+    def test_overflow_node_reload(self):
+        # Referencias más grandes que una página: las hojas van a overflow
+        big = {k: str(k) * 3000 for k in range(10)}
+        for key, ref in big.items():
+            self.tree.add(key, ref)
+        overflow_file = self.tree.index_file.overflow_filename
+        self.assertGreater(os.path.getsize(overflow_file), 0)
+
+        self.reopen()
+
+        for key, ref in big.items():
+            self.assertEqual(self.tree.search(key), ref)
+        self.assertEqual(self.tree.get_all(), sorted(big.items()))
+
+    def test_overflow_slot_reused(self):
+        self.tree.add(1, "a" * 3000)
+        self.tree.add(2, "b" * 3000)
+        overflow_file = self.tree.index_file.overflow_filename
+        size = os.path.getsize(overflow_file)
+
+        # Reescribir la hoja con un contenido que cabe en su espacio, también
+        # tras reabrir el índice, no hace crecer el archivo
+        self.tree.remove(2)
+        self.tree.add(2, "c" * 3000)
+        self.reopen()
+        self.tree.remove(1)
+        self.tree.add(1, "d" * 3000)
+
+        self.assertEqual(os.path.getsize(overflow_file), size)
+        self.assertEqual(self.tree.search(1), "d" * 3000)
+        self.assertEqual(self.tree.search(2), "c" * 3000)
+
+    def test_clear(self):
+        self.insert_all()
+        self.tree.clear()
+
+        self.assertEqual(self.tree.get_all(), [])
+        self.tree.add(1, "a")
+        self.assertEqual(self.tree.search(1), "a")
+
+    def test_migrate_json_nodes(self):
+        self.tree.close()
+        storage = os.path.join(self.temp_dir, "legacy")
+        os.makedirs(storage)
+
+        # Formato anterior: raíz en un archivo de 4 bytes y un JSON por nodo,
+        # con hojas de pares (clave, referencia)
+        nodes = {
+            0: {"is_leaf": False, "keys": [3], "children": [1, 2], "size": 1},
+            1: {"is_leaf": True, "keys": [[1, "a"], [2, "b"]], "children": [],
+                "next_leaf": 2},
+            2: {"is_leaf": True, "keys": [[3, "c"]], "children": [],
+                "next_leaf": None},
+        }
+        with open(os.path.join(storage, "old_index.dat"), "wb") as f:
+            f.write(struct.pack("i", 0))
+        for node_id, data in nodes.items():
+            with open(os.path.join(storage, f"node_{node_id}.json"), "w") as f:
+                json.dump(data, f)
+
+        self.tree = BPlusTree(storage_path=storage, index_name="old")
+
+        self.assertEqual(self.tree.get_all(), [(1, "a"), (2, "b"), (3, "c")])
+        self.assertEqual(self.tree.search(3), "c")
+        self.assertFalse(any(n.endswith(".json") for n in os.listdir(storage)))
+        # Los IDs nuevos no pisan los nodos migrados
+        self.tree.add(4, "d")
+        self.tree.add(5, "e")
+        self.assertEqual([k for k, _ in self.tree.get_all()], [1, 2, 3, 4, 5])
+
+
+class TestBPlusFile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_file = BPlusFile(self.temp_dir, "test", cache_size=2)
+
+    def tearDown(self):
+        self.index_file.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_leaf(self, keys):
+        node = BPlusTreeNode(is_leaf=True)
+        node.keys = list(keys)
+        node.refs = [f"ref_{k}" for k in keys]
+        node.size = len(node.keys)
+        return node
+
+    def test_write_and_read_past_cache(self):
+        for node_id in range(5):
+            self.index_file.write_node(self.make_leaf([node_id]), node_id)
+
+        # Con cache_size=2 los primeros nodos se leen del disco
+        self.assertEqual(len(self.index_file._cache), 2)
+        for node_id in range(5):
+            node = self.index_file.read_node(node_id)
+            self.assertEqual(node.keys, [node_id])
+            self.assertEqual(node.refs, [f"ref_{node_id}"])
+
+    def test_header_persists_next_id(self):
+        self.index_file.write_node(self.make_leaf([1]), 3)
+        self.index_file.write_header(3)
+        self.index_file.close()
+
+        reopened = BPlusFile(self.temp_dir, "test")
+        try:
+            self.assertEqual(reopened.get_header(), 3)
+            self.assertEqual(reopened.allocate_id(), 4)
+        finally:
+            reopened.close()
+
+    def test_read_missing_node(self):
+        with self.assertRaises(Exception):
+            self.index_file.read_node(7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import importlib
+import sys
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# "module:attribute" pairs checked in a single interpreter
+CHECKS = [
+    "parser.sql_engine:create_sql_parser_engine",
+    "parser.unified_adapter:UnifiedDatabaseAdapter",
+    "inverted_index.preprocessing:TextPreprocessor",
+    "inverted_index.indexer:SPIMIIndexer",
+]
+
+
+def check(target):
+    module_name, attr = target.split(":")
+    try:
+        getattr(importlib.import_module(module_name), attr)
+        return target, None
+    except Exception:
+        return target, traceback.format_exc()
+
+
+def main():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(check, CHECKS))
+
+    failed = [(target, tb) for target, tb in results if tb is not None]
+    for target, tb in results:
+        print(f"[{'ERROR' if tb else 'OK'}] {target}")
+
+    # Tracebacks are printed at the end, once every check has finished
+    for target, tb in failed:
+        print(f"\n--- {target} ---\n{tb}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,33 @@
+import array
 import os
 import hashlib
-import csv
+import pickle
+import struct
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+# Encabezado de cada bucket: (local_depth << 32) | next_bucket_id
+BUCKET_HEADER = struct.Struct("<Q")
+BUCKET_SUFFIX = ".bin"
+# Encabezado del directorio: global_depth, max_depth, next_bucket_id; luego
+# las entradas como uint32
+DIRECTORY_HEADER = struct.Struct("<III")
+
 
 def md5_hash(key: str, depth: int) -> int:
     """Genera hash MD5 y retorna los últimos 'depth' bits como entero."""
-    h = hashlib.md5(str(key).encode()).hexdigest()
-    bits = bin(int(h, 16))[2:].zfill(128)
-    return int(bits[-depth:], 2) if depth > 0 else 0
+    if depth <= 0:
+        return 0
+    # Los últimos bits del hash son los bits bajos del digest (big-endian):
+    # se extraen con una máscara, sin pasar por hex ni por un string binario
+    digest = hashlib.md5(str(key).encode()).digest()
+    return int.from_bytes(digest, "big") & ((1 << depth) - 1)
 
 
 class TextBucket:
-    """Bucket almacenado en archivo de texto plano."""
+    """Bucket almacenado en disco: encabezado binario seguido de uno o más
+    bloques pickle con listas de registros (conservan los tipos de Python)."""
 
     def __init__(self, path: Path, capacity: int, local_depth: int = 1):
         self.path = Path(path)
@@ -21,6 +35,14 @@ class TextBucket:
         self.local_depth = local_depth
         self.next_bucket_id = 0
         self.records: List[Dict[str, Any]] = []
+        # str(id) -> posición en self.records (búsqueda sin recorrer el bucket)
+        self._by_id: Dict[str, int] = {}
+        # Cambios en memoria aún no escritos (ver flush). Si solo se agregaron
+        # registros nuevos, se anexan al archivo; _rewrite pide reescribirlo
+        self.dirty = False
+        self._rewrite = False
+        # Cantidad de registros (los primeros de self.records) ya en disco
+        self._persisted = 0
 
         if self.path.exists():
             self._load()
@@ -28,76 +50,103 @@ class TextBucket:
             self._save()
 
     def _load(self):
-        """Carga bucket desde archivo texto."""
-        with open(self.path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        if len(lines) < 2:
-            return
+        """Carga bucket desde archivo."""
+        with open(self.path, "rb") as f:
+            header = f.read(BUCKET_HEADER.size)
+            if len(header) < BUCKET_HEADER.size:
+                return
 
-        meta = lines[0].strip().split(",")
-        self.local_depth = int(meta[0])
-        self.next_bucket_id = int(meta[1])
+            (packed,) = BUCKET_HEADER.unpack(header)
+            self.local_depth = packed >> 32
+            self.next_bucket_id = packed & 0xFFFFFFFF
 
-        self.records = []
-        reader = csv.DictReader(lines[1:])
-        for row in reader:
-            self.records.append(row)
+            self.records = []
+            while True:
+                try:
+                    self.records.extend(pickle.load(f))
+                except EOFError:
+                    break
+        self._by_id = {str(rec.get("id")): i for i, rec in enumerate(self.records)}
+        self._persisted = len(self.records)
 
     def _save(self):
-        """Guarda bucket en archivo texto."""
-        with open(self.path, "w", encoding="utf-8", newline="") as f:
-            f.write(f"{self.local_depth},{self.next_bucket_id}\n")
-
+        """Guarda bucket en archivo (un solo bloque con todos los registros)."""
+        with open(self.path, "wb") as f:
+            f.write(
+                BUCKET_HEADER.pack((self.local_depth << 32) | self.next_bucket_id)
+            )
             if self.records:
-                fieldnames = self.records[0].keys()
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(self.records)
+                pickle.dump(self.records, f, protocol=5)
+        self._persisted = len(self.records)
+        self._rewrite = False
+
+    def _append_rows(self, records: List[Dict[str, Any]]):
+        """Anexa registros nuevos como un bloque más, sin reescribir el archivo
+        (la metadata no cambia al insertar)."""
+        with open(self.path, "ab") as f:
+            pickle.dump(records, f, protocol=5)
+        self._persisted = len(self.records)
+
+    def flush(self):
+        """Escribe el bucket a disco solo si tiene cambios pendientes."""
+        if not self.dirty:
+            return
+        if self._rewrite or not self.path.exists():
+            self._save()
+        else:
+            self._append_rows(self.records[self._persisted :])
+        self.dirty = False
 
     def is_full(self) -> bool:
         return len(self.records) >= self.capacity
 
     def insert(self, record: Dict[str, Any]):
-        """Inserta o actualiza registro."""
-        key = record.get("id")
-        for i, rec in enumerate(self.records):
-            if rec.get("id") == key:
-                self.records[i] = record
-                self._save()
-                return
+        """Inserta o actualiza registro (en memoria; se persiste con flush)."""
+        # Copia: el registro cacheado no cambia si el llamador modifica el suyo
+        record = dict(record)
+        key = str(record.get("id"))
+        self.dirty = True
+        i = self._by_id.get(key)
+        if i is not None:
+            self.records[i] = record
+            self._rewrite = True
+            return
+        self._by_id[key] = len(self.records)
         self.records.append(record)
-        self._save()
 
     def delete(self, key: str) -> bool:
         """Elimina registro por key."""
-        for i, rec in enumerate(self.records):
-            if rec.get("id") == key:
-                del self.records[i]
-                self._save()
-                return True
-        return False
+        i = self._by_id.pop(str(key), None)
+        if i is None:
+            return False
+        # El último registro ocupa el hueco: O(1). El orden cambia, pero un
+        # delete reescribe el archivo completo de todos modos
+        last = self.records.pop()
+        if i < len(self.records):
+            self.records[i] = last
+            self._by_id[str(last.get("id"))] = i
+        self.dirty = True
+        self._rewrite = True
+        return True
 
     def search(self, key: str) -> Optional[Dict[str, Any]]:
         """Busca registro por key."""
-        for rec in self.records:
-            if rec.get("id") == key:
-                return rec
-        return None
+        i = self._by_id.get(str(key))
+        return None if i is None else self.records[i]
 
     def get_all(self) -> List[Dict[str, Any]]:
         return list(self.records)
 
 
 class TextDirectory:
-    """Directorio almacenado en archivo texto."""
+    """Directorio almacenado en archivo binario de ancho fijo."""
 
-    def _init_(self, path: Path, global_depth: int, max_depth: int):
+    def __init__(self, path: Path, global_depth: int, max_depth: int):
         self.path = Path(path)
         self.global_depth = global_depth
         self.max_depth = max_depth
         self.next_bucket_id = 1
-        self.entries: List[int] = []
+        self.entries = array.array("I")
 
         if self.path.exists():
             self._load()
@@ -106,27 +155,31 @@ class TextDirectory:
 
     def _load(self):
         """Carga directorio desde archivo."""
-        with open(self.path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with open(self.path, "rb") as f:
+            header = f.read(DIRECTORY_HEADER.size)
+            data = f.read()
 
-        meta = lines[0].strip().split(",")
-        self.global_depth = int(meta[0])
-        self.max_depth = int(meta[1])
-        self.next_bucket_id = int(meta[2])
+        (
+            self.global_depth,
+            self.max_depth,
+            self.next_bucket_id,
+        ) = DIRECTORY_HEADER.unpack(header)
 
-        self.entries = [int(line.strip()) for line in lines[1:]]
+        self.entries = array.array("I")
+        self.entries.frombytes(data)
 
     def _save(self):
-        """Guarda directorio en archivo."""
-        with open(self.path, "w", encoding="utf-8") as f:
-            f.write(f"{self.global_depth},{self.max_depth},{self.next_bucket_id}\n")
-            for bid in self.entries:
-                f.write(f"{bid}\n")
+        """Guarda directorio en archivo (una sola escritura)."""
+        header = DIRECTORY_HEADER.pack(
+            self.global_depth, self.max_depth, self.next_bucket_id
+        )
+        with open(self.path, "wb") as f:
+            f.write(header + self.entries.tobytes())
 
     def _initialize(self):
         """Inicializa directorio vacío."""
         size = 2**self.global_depth
-        self.entries = [self.next_bucket_id] * size
+        self.entries = array.array("I", [self.next_bucket_id]) * size
         self.next_bucket_id += 1
         self._save()
 
@@ -137,7 +190,7 @@ class TextDirectory:
 
     def double_directory(self):
         """Duplica el directorio (incrementa global_depth)."""
-        self.entries = self.entries + self.entries[:]
+        self.entries.extend(self.entries)
         self.global_depth += 1
         self._save()
 
@@ -160,9 +213,9 @@ class TextDirectory:
 
 
 class SQLHashEngine:
-    """Motor SQL simple con índice Extendible Hashing en archivos texto."""
+    """Motor SQL simple con índice Extendible Hashing en disco."""
 
-    def _init_(
+    def __init__(
         self,
         data_dir: str = "sql_data",
         bucket_capacity: int = 3,
@@ -175,28 +228,58 @@ class SQLHashEngine:
         self.buckets_dir.mkdir(parents=True, exist_ok=True)
 
         self.capacity = bucket_capacity
-        dir_path = self.base / "directory.txt"
+        dir_path = self.base / "directory.bin"
 
         self.directory = TextDirectory(dir_path, initial_depth, max_depth)
 
-        if not list(self.buckets_dir.glob("bucket_*.txt")):
+        # Caché LRU de buckets: bucket_id -> TextBucket. Evita releer el
+        # archivo en cada operación; las escrituras son inmediatas
+        # (INSERT/DELETE hacen flush del bucket que modifican)
+        self._bucket_cache: "OrderedDict[int, TextBucket]" = OrderedDict()
+        self._cache_cap = 64
+
+        if not list(self.buckets_dir.glob(f"bucket_*{BUCKET_SUFFIX}")):
             bid = self.directory.entries[0]
             self._create_bucket(bid, self.directory.global_depth)
 
     def _bucket_path(self, bucket_id: int) -> Path:
-        return self.buckets_dir / f"bucket_{bucket_id}.txt"
+        return self.buckets_dir / f"bucket_{bucket_id}{BUCKET_SUFFIX}"
+
+    def _cache_bucket(self, bucket_id: int, bucket: TextBucket) -> TextBucket:
+        """Agrega un bucket a la caché, desalojando (y escribiendo) el LRU."""
+        self._bucket_cache[bucket_id] = bucket
+        if len(self._bucket_cache) > self._cache_cap:
+            _, evicted = self._bucket_cache.popitem(last=False)
+            evicted.flush()
+        return bucket
 
     def _create_bucket(self, bucket_id: int, local_depth: int) -> TextBucket:
         """Crea nuevo bucket."""
         path = self._bucket_path(bucket_id)
-        return TextBucket(path, self.capacity, local_depth)
+        return self._cache_bucket(
+            bucket_id, TextBucket(path, self.capacity, local_depth)
+        )
 
     def _load_bucket(self, bucket_id: int) -> TextBucket:
-        """Carga bucket existente."""
+        """Carga bucket existente (desde la caché si está)."""
+        bucket = self._bucket_cache.get(bucket_id)
+        if bucket is not None:
+            self._bucket_cache.move_to_end(bucket_id)
+            return bucket
         path = self._bucket_path(bucket_id)
         if not path.exists():
             return self._create_bucket(bucket_id, self.directory.global_depth)
-        return TextBucket(path, self.capacity)
+        return self._cache_bucket(bucket_id, TextBucket(path, self.capacity))
+
+    def flush_all(self):
+        """Escribe a disco todos los buckets con cambios pendientes."""
+        for bucket in self._bucket_cache.values():
+            bucket.flush()
+
+    def close(self):
+        """Vacía la caché de buckets (y escribe lo pendiente, si hubiera)."""
+        self.flush_all()
+        self._bucket_cache.clear()
 
     def _split_bucket(self, bucket_id: int):
         """Divide un bucket."""
@@ -206,22 +289,29 @@ class SQLHashEngine:
 
         bid1 = self.directory.allocate_bucket_id()
         bid2 = self.directory.allocate_bucket_id()
-        b1 = self._create_bucket(bid1, new_ld)
-        b2 = self._create_bucket(bid2, new_ld)
+        # Fuera de la caché hasta terminar de repartir: un desalojo a mitad del
+        # reparto dejaría inserciones en un objeto que ya no se escribe
+        b1 = TextBucket(self._bucket_path(bid1), self.capacity, new_ld)
+        b2 = TextBucket(self._bucket_path(bid2), self.capacity, new_ld)
 
         all_records = bucket.get_all()
         for rec in all_records:
             key = rec.get("id")
-            bits = bin(int(hashlib.md5(str(key).encode()).hexdigest(), 16))[2:].zfill(
-                128
-            )
-            if bits[-new_ld] == "0":
+            if (md5_hash(key, new_ld) >> (new_ld - 1)) & 1 == 0:
                 b1.insert(rec)
             else:
                 b2.insert(rec)
 
+        # Los buckets nuevos llegan a disco antes de que el directorio deje
+        # de apuntar al original y antes de borrar su archivo
+        b1.flush()
+        b2.flush()
         self.directory.update_pointers(bucket_id, bid1, bid2, new_ld - 1)
 
+        # El bucket original deja de existir: se descarta sin escribirlo
+        self._bucket_cache.pop(bucket_id, None)
+        self._cache_bucket(bid1, b1)
+        self._cache_bucket(bid2, b2)
         try:
             os.remove(self._bucket_path(bucket_id))
         except:
@@ -238,6 +328,7 @@ class SQLHashEngine:
 
         if bucket.search(key):
             bucket.insert(record)
+            bucket.flush()
             return
 
         if bucket.is_full():
@@ -254,8 +345,10 @@ class SQLHashEngine:
                 self.INSERT(record)
             else:
                 bucket.insert(record)
+                bucket.flush()
         else:
             bucket.insert(record)
+            bucket.flush()
 
     def SELECT(self, key: str) -> Optional[Dict[str, Any]]:
         """SELECT: Busca registro por id."""
@@ -267,7 +360,9 @@ class SQLHashEngine:
         """DELETE: Elimina registro por id."""
         bid = self.directory.get_bucket_id(key)
         bucket = self._load_bucket(bid)
-        return bucket.delete(key)
+        deleted = bucket.delete(key)
+        bucket.flush()
+        return deleted
 
     def SELECT_ALL(self) -> List[Dict[str, Any]]:
         """SELECT *: Retorna todos los registros."""
@@ -288,13 +383,14 @@ class SQLHashEngine:
 
         for i, bid in enumerate(self.directory.entries):
             bucket = self._load_bucket(bid)
-            s += f"[{i:0{self.directory.global_depth}b}] -> bucket_{bid}.txt "
+            s += f"[{i:0{self.directory.global_depth}b}] -> "
+            s += f"{self._bucket_path(bid).name} "
             s += f"(ld={bucket.local_depth}, records={len(bucket.records)})\n"
 
         return s
 
 
-if __name__ == "_main_":
+if __name__ == "__main__":
     db = SQLHashEngine(
         data_dir="sql_data", bucket_capacity=2, initial_depth=1, max_depth=3
     )
@@ -319,3 +415,4 @@ if __name__ == "_main_":
     print(db.SELECT("002"))
 
     print("\n" + db.DUMP_INDEX())
+    db.close()
@@ -1,23 +1,64 @@
 import os
+import json
 import pickle
 import math
+import struct
+from array import array
 from collections import defaultdict
 import heapq
 from typing import List, Tuple, Dict
 
+import numpy as np
+
+# doc_norms.bin: "<Q" document count, then int64 doc_ids and float64 norms
+NORMS_HEADER = struct.Struct("<Q")
+# block_count.bin: number of SPIMI blocks written so far
+BLOCK_COUNT = struct.Struct("<I")
+
+
+def write_doc_norms(path: str, doc_norms: Dict[int, float]):
+    doc_ids = np.fromiter(doc_norms.keys(), dtype=np.int64, count=len(doc_norms))
+    norms = np.fromiter(doc_norms.values(), dtype=np.float64, count=len(doc_norms))
+    with open(path, 'wb') as f:
+        f.write(NORMS_HEADER.pack(len(doc_norms)))
+        f.write(doc_ids.tobytes())
+        f.write(norms.tobytes())
+
+
+def read_doc_norms_count(path: str) -> int:
+    with open(path, 'rb') as f:
+        return NORMS_HEADER.unpack(f.read(NORMS_HEADER.size))[0]
+
+
+def read_doc_norms(path: str) -> Dict[int, float]:
+    n = read_doc_norms_count(path)
+    if n == 0:
+        return {}
+    data = np.memmap(path, dtype=np.uint8, mode='r', offset=NORMS_HEADER.size)
+    doc_ids = data[:8 * n].view(np.int64)
+    norms = data[8 * n:16 * n].view(np.float64)
+    return dict(zip(doc_ids.tolist(), norms.tolist()))
+
 
 class SPIMIIndexer:
     def __init__(self, block_size_limit: int = 10000, output_dir: str = "index_data"):
         self.block_size_limit = block_size_limit
         self.output_dir = output_dir
         self.dictionary = defaultdict(list)
-        self.block_count = 0
         self.doc_lengths = {}
+        self.block_count_file = os.path.join(output_dir, "block_count.bin")
 
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-    def add_document(self, doc_id: int, tokens: List[str]):
+        # Resume the block numbering of a previous run, if any
+        self.block_count = 0
+        if os.path.exists(self.block_count_file):
+            with open(self.block_count_file, 'rb') as f:
+                self.block_count = BLOCK_COUNT.unpack(f.read(BLOCK_COUNT.size))[0]
+
+    def add_document(self, doc_id: int, tokens: List[str]) -> bool:
+        """Adds a document; returns True if the block was flushed to disk."""
         term_freqs = defaultdict(int)
         for token in tokens:
             term_freqs[token] += 1
@@ -27,6 +68,8 @@ class SPIMIIndexer:
 
         if len(self.dictionary) >= self.block_size_limit:
             self.write_block_to_disk()
+            return True
+        return False
 
     def write_block_to_disk(self):
         if not self.dictionary:
@@ -45,6 +88,9 @@ class SPIMIIndexer:
         self.block_count += 1
         self.dictionary.clear()
 
+        with open(self.block_count_file, 'wb') as f:
+            f.write(BLOCK_COUNT.pack(self.block_count))
+
     def merge_blocks(self):
         print("Merging blocks hierarchically...")
 
@@ -138,7 +184,9 @@ class SPIMIIndexer:
     def compute_tfidf_and_norms(self, total_docs: int):
         raw_path = os.path.join(self.output_dir, "inverted_index.dat")
         final_path = os.path.join(self.output_dir, "tfidf_index.dat")
-        norms_path = os.path.join(self.output_dir, "doc_norms.dat")
+        norms_path = os.path.join(self.output_dir, "doc_norms.bin")
+        matrix_path = os.path.join(self.output_dir, "tfidf_matrix.npz")
+        meta_path = os.path.join(self.output_dir, "meta.json")
 
         if not os.path.exists(raw_path):
             print("No inverted index found to compute TF-IDF.")
@@ -146,6 +194,13 @@ class SPIMIIndexer:
 
         doc_norms = defaultdict(float)
 
+        # Term-major sparse matrix (CSR over terms) for vectorized scoring:
+        # postings of term i are doc_ids/weights[term_ptr[i]:term_ptr[i + 1]]
+        terms = []
+        term_ptr = array("q", [0])
+        posting_docs = array("q")
+        posting_weights = array("d")
+
         with open(raw_path, 'rb') as f_in, open(final_path, 'wb') as f_out:
             while True:
                 try:
@@ -167,8 +222,46 @@ class SPIMIIndexer:
 
                 pickle.dump((term, weighted_postings), f_out)
 
+                terms.append(term)
+                for doc_id, weight in weighted_postings:
+                    posting_docs.append(doc_id)
+                    posting_weights.append(weight)
+                term_ptr.append(len(posting_docs))
+
         doc_norms = {k: math.sqrt(v) for k, v in doc_norms.items()}
-        with open(norms_path, 'wb') as f_norms:
-            pickle.dump(doc_norms, f_norms)
+        write_doc_norms(norms_path, doc_norms)
+
+        self._write_matrix(
+            matrix_path, terms, term_ptr, posting_docs, posting_weights, doc_norms
+        )
+
+        # Small summary so listings don't need to load the index
+        with open(meta_path, 'w') as f_meta:
+            json.dump(
+                {"vocabulary_size": len(terms), "documents_count": len(doc_norms)},
+                f_meta,
+            )
 
         print("TF-IDF and Norms computed.")
+
+    @staticmethod
+    def _write_matrix(
+        path, terms, term_ptr, posting_docs, posting_weights, doc_norms
+    ):
+        # Documents are renumbered 0..n-1; doc_ids maps the column back to the id
+        doc_ids, doc_index = np.unique(
+            np.frombuffer(posting_docs, dtype=np.int64), return_inverse=True
+        )
+        norms = np.array(
+            [doc_norms.get(int(d), 0.0) for d in doc_ids], dtype=np.float32
+        )
+        np.savez(
+            path,
+            terms=np.array(terms, dtype=str),
+            term_ptr=np.frombuffer(term_ptr, dtype=np.int64),
+            doc_index=doc_index.astype(np.int32),
+            # float16 halves the bytes read per posting; norms stay float32
+            weights=np.frombuffer(posting_weights, dtype=np.float64).astype(np.float16),
+            doc_ids=doc_ids,
+            doc_norms=norms,
+        )
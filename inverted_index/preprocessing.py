@@ -69,3 +69,19 @@ class TextPreprocessor:
         ]
         
         return processed_tokens
+
+
+# One preprocessor per process and language, reused across calls so worker
+# processes load stopwords and the stemmer only once
+_preprocessors = {}
+
+
+def tokenize_bytes(content: bytes, language: str = 'spanish') -> list[str]:
+    """
+    Decodes UTF-8 bytes and preprocesses them. Top-level so it can be sent
+    to a ProcessPoolExecutor (only the raw bytes cross the process boundary).
+    """
+    preprocessor = _preprocessors.get(language)
+    if preprocessor is None:
+        preprocessor = _preprocessors[language] = TextPreprocessor(language)
+    return preprocessor.preprocess(content.decode('utf-8'))
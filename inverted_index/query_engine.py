@@ -4,7 +4,11 @@ import math
 import heapq
 from collections import defaultdict
 from typing import List, Tuple
+
+import numpy as np
+
 from .preprocessing import TextPreprocessor
+from .indexer import read_doc_norms
 
 class QueryEngine:
     def __init__(self, index_dir: str = "index_data"):
@@ -13,19 +17,28 @@ class QueryEngine:
         self.vocabulary = {} # term -> file_offset (byte position in index)
         self.doc_norms = {}
         self.index_file = os.path.join(index_dir, "tfidf_index.dat")
-        self.norms_file = os.path.join(index_dir, "doc_norms.dat")
-        
+        self.norms_file = os.path.join(index_dir, "doc_norms.bin")
+        self.legacy_norms_file = os.path.join(index_dir, "doc_norms.dat")
+        self.matrix_file = os.path.join(index_dir, "tfidf_matrix.npz")
+        self.matrix = None  # term-major TF-IDF arrays (see SPIMIIndexer._write_matrix)
+
         self.load_metadata()
 
     def load_metadata(self):
         """
         Loads document norms and builds a vocabulary map for fast seek.
+        If the index has a TF-IDF matrix, it is loaded once and used instead.
         """
         # print("Loading index metadata...")
+        if os.path.exists(self.matrix_file):
+            self._load_matrix()
+            return
         
         # Load norms
         if os.path.exists(self.norms_file):
-            with open(self.norms_file, 'rb') as f:
+            self.doc_norms = read_doc_norms(self.norms_file)
+        elif os.path.exists(self.legacy_norms_file):
+            with open(self.legacy_norms_file, 'rb') as f:
                 self.doc_norms = pickle.load(f)
         
         # Build vocabulary map (term -> offset)
@@ -40,6 +53,58 @@ class QueryEngine:
                         break
         # print(f"Metadata loaded. Vocabulary size: {len(self.vocabulary)}")
 
+    def _load_matrix(self):
+        with np.load(self.matrix_file) as data:
+            self.matrix = {name: data[name] for name in data.files}
+        terms = self.matrix.pop("terms")
+        self.vocabulary = {term: i for i, term in enumerate(terms.tolist())}
+        # Zero norms are treated as 1.0, as in the pickled path
+        norms = self.matrix["doc_norms"]
+        self.matrix["doc_norms"] = np.where(norms == 0, 1.0, norms).astype(np.float32)
+        self.doc_norms = dict(zip(self.matrix["doc_ids"].tolist(), norms.tolist()))
+
+    def _search_matrix(self, query_tf, k: int) -> List[Tuple[int, float]]:
+        m = self.matrix
+        n_docs = len(m["doc_ids"])
+
+        # Sparse query vector, built once: vocabulary rows and their weights
+        rows = []
+        w_q = []
+        for term, q_tf in query_tf.items():
+            t = self.vocabulary.get(term)
+            if t is not None:
+                rows.append(t)
+                w_q.append(1 + math.log10(q_tf))
+        if not rows:
+            return []
+
+        # Gather the postings of every query term and accumulate them in a
+        # single bincount (the matrix-vector product over the touched rows)
+        rows = np.array(rows)
+        starts = m["term_ptr"][rows]
+        lengths = m["term_ptr"][rows + 1] - starts
+        segments = [slice(lo, lo + n) for lo, n in zip(starts, lengths)]
+        docs = np.concatenate([m["doc_index"][s] for s in segments])
+        weights = np.concatenate([m["weights"][s] for s in segments]).astype(np.float32)
+        weights *= np.repeat(np.array(w_q, dtype=np.float32), lengths)
+
+        scores = np.bincount(docs, weights=weights, minlength=n_docs)
+        touched = np.bincount(docs, minlength=n_docs) > 0
+
+        candidates = np.flatnonzero(touched)
+        final = scores[candidates] / m["doc_norms"][candidates]
+
+        # Top-k with argpartition (O(n)) and only sort those k
+        if k <= 0:
+            return []
+        if k < len(final):
+            top = np.argpartition(-final, k - 1)[:k]
+        else:
+            top = np.arange(len(final))
+        top = top[np.argsort(-final[top], kind="stable")]
+        doc_ids = m["doc_ids"][candidates[top]].tolist()
+        return list(zip(doc_ids, final[top].tolist()))
+
     def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
         """
         Executes a query and returns top-k documents.
@@ -54,7 +119,10 @@ class QueryEngine:
         query_tf = defaultdict(int)
         for token in query_tokens:
             query_tf[token] += 1
-            
+
+        if self.matrix is not None:
+            return self._search_matrix(query_tf, k)
+
         scores = defaultdict(float)
         
         if not os.path.exists(self.index_file):
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 from enum import Enum
 from typing import Any, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
 
 
 class IndexType(Enum):
@@ -87,6 +87,17 @@ class Condition:
         return self.column is not None and self.operator is not None
 
 
+def _to_plain(value: Any) -> Any:
+    """Convierte nodos del AST (dataclasses, enums, listas) a tipos JSON."""
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value):
+        return {f.name: _to_plain(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return value
+
+
 @dataclass
 class ParsedQuery:
     """Clase base para todas las consultas parseadas"""
@@ -94,6 +105,10 @@ class ParsedQuery:
     operation_type: OperationType
     table_name: str
 
+    def to_dict(self) -> dict:
+        """AST como diccionario serializable a JSON"""
+        return _to_plain(self)
+
 
 @dataclass
 class CreateTableQuery(ParsedQuery):
@@ -133,33 +133,34 @@ class SQLLexer:
         # El resto se mantiene en mayúsculas (INT, VARCHAR, SEQ, etc.)
     }
 
+    # Patrones compilados una sola vez, al importar el módulo; todas las
+    # instancias del lexer comparten la misma tabla
+    PATTERNS = [
+        (re.compile(r'"([^"\\]|\\.)*"'), TokenType.STRING),
+        (re.compile(r"'([^'\\]|\\.)*'"), TokenType.STRING),
+        (re.compile(r"-?\d+\.\d+"), TokenType.NUMBER),
+        (re.compile(r"-?\d+"), TokenType.NUMBER),
+        (re.compile(r"<="), TokenType.LESS_EQUAL),
+        (re.compile(r">="), TokenType.GREATER_EQUAL),
+        (re.compile(r"<"), TokenType.LESS_THAN),
+        (re.compile(r">"), TokenType.GREATER_THAN),
+        (re.compile(r"="), TokenType.EQUALS),
+        (re.compile(r"\("), TokenType.LPAREN),
+        (re.compile(r"\)"), TokenType.RPAREN),
+        (re.compile(r"\["), TokenType.LBRACKET),
+        (re.compile(r"\]"), TokenType.RBRACKET),
+        (re.compile(r","), TokenType.COMMA),
+        (re.compile(r";"), TokenType.SEMICOLON),
+        (re.compile(r"\*"), TokenType.ASTERISK),
+        (re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*"), TokenType.IDENTIFIER),
+    ]
+
     def __init__(self):
         self.text = ""
         self.pos = 0
         self.line = 1
         self.column = 1
 
-        # Patrones compilados para mejor rendimiento
-        self.patterns = [
-            (re.compile(r'"([^"\\]|\\.)*"'), TokenType.STRING),
-            (re.compile(r"'([^'\\]|\\.)*'"), TokenType.STRING),
-            (re.compile(r"-?\d+\.\d+"), TokenType.NUMBER),
-            (re.compile(r"-?\d+"), TokenType.NUMBER),
-            (re.compile(r"<="), TokenType.LESS_EQUAL),
-            (re.compile(r">="), TokenType.GREATER_EQUAL),
-            (re.compile(r"<"), TokenType.LESS_THAN),
-            (re.compile(r">"), TokenType.GREATER_THAN),
-            (re.compile(r"="), TokenType.EQUALS),
-            (re.compile(r"\("), TokenType.LPAREN),
-            (re.compile(r"\)"), TokenType.RPAREN),
-            (re.compile(r"\["), TokenType.LBRACKET),
-            (re.compile(r"\]"), TokenType.RBRACKET),
-            (re.compile(r","), TokenType.COMMA),
-            (re.compile(r";"), TokenType.SEMICOLON),
-            (re.compile(r"\*"), TokenType.ASTERISK),
-            (re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*"), TokenType.IDENTIFIER),
-        ]
-
     def tokenize(self, text: str) -> List[Token]:
         """Tokeniza el texto SQL y retorna lista de tokens"""
         self.text = text
@@ -232,7 +233,7 @@ class SQLLexer:
         start_column = self.column
 
         # Intentar cada patrón
-        for pattern, token_type in self.patterns:
+        for pattern, token_type in self.PATTERNS:
             match = pattern.match(self.text, self.pos)
             if match:
                 value = match.group(0)
@@ -60,10 +60,24 @@ class MockDatabaseAdapter:
         """Retorna el log de operaciones ejecutadas"""
         return self.operations_log.copy()
 
+    def reset(self):
+        """Olvida las tablas simuladas y el log de operaciones"""
+        self.tables.clear()
+        self.operations_log.clear()
+
 
 class QueryTranslator:
     """Traductor principal de consultas SQL a operaciones del gestor"""
 
+    # Despacho por el tipo de operación del AST (un solo lookup por consulta)
+    _HANDLERS = {
+        OperationType.CREATE_TABLE: "_execute_create_table",
+        OperationType.CREATE_TABLE_FROM_FILE: "_execute_create_table_from_file",
+        OperationType.SELECT: "_execute_select",
+        OperationType.INSERT: "_execute_insert",
+        OperationType.DELETE: "_execute_delete",
+    }
+
     def __init__(self, database_adapter=None, semantic_validator=None):
         self.db_adapter = database_adapter or MockDatabaseAdapter()
         self.validator = semantic_validator or SemanticValidator()
@@ -84,21 +98,10 @@ class QueryTranslator:
                     result["errors"] = errors
                     return result
 
-            if isinstance(query, CreateTableQuery):
-                result["result"] = self._execute_create_table(query)
-                result["operation"] = "CREATE_TABLE"
-            elif isinstance(query, CreateTableFromFileQuery):
-                result["result"] = self._execute_create_table_from_file(query)
-                result["operation"] = "CREATE_TABLE_FROM_FILE"
-            elif isinstance(query, SelectQuery):
-                result["result"] = self._execute_select(query)
-                result["operation"] = "SELECT"
-            elif isinstance(query, InsertQuery):
-                result["result"] = self._execute_insert(query)
-                result["operation"] = "INSERT"
-            elif isinstance(query, DeleteQuery):
-                result["result"] = self._execute_delete(query)
-                result["operation"] = "DELETE"
+            handler = self._HANDLERS.get(query.operation_type)
+            if handler is not None:
+                result["result"] = getattr(self, handler)(query)
+                result["operation"] = query.operation_type.value
 
             result["success"] = True
 
@@ -253,13 +256,20 @@ class QueryTranslator:
     def get_table_info(self, table_name: str) -> Optional[Dict[str, Any]]:
         """Obtiene información de una tabla"""
         if table_name in self.validator.tables:
-            schema = self.validator.tables[table_name]
-            return {
-                "name": schema.name,
-                "columns": [{"name": col.name, "type": col.data_type.value, "is_key": col.is_key, "index": col.index_type.value if col.index_type else None} for col in schema.columns.values()]
-            }
+            return self._schema_info(self.validator.tables[table_name])
         return None
 
+    def describe_all(self) -> Dict[str, Dict[str, Any]]:
+        """Información de todas las tablas registradas: {tabla: info}"""
+        return {name: self._schema_info(schema) for name, schema in self.validator.tables.items()}
+
+    @staticmethod
+    def _schema_info(schema) -> Dict[str, Any]:
+        return {
+            "name": schema.name,
+            "columns": [{"name": col.name, "type": col.data_type.value, "is_key": col.is_key, "index": col.index_type.value if col.index_type else None} for col in schema.columns.values()]
+        }
+
     def list_tables(self) -> List[str]:
         """Lista todas las tablas registradas"""
         return list(self.validator.tables.keys())
@@ -4,12 +4,14 @@ Proyecto CS2702 - Base de Datos 2 UTEC
 """
 
 import time
-from typing import Dict, List, Any, Tuple
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, List, Any, Set, Tuple
 from .lexer import SQLLexer
 from .sql_parser import SQLParser, ParseError
 from .semantic_validator import SemanticValidator
 from .query_translator import QueryTranslator, MockDatabaseAdapter
-from .ast_nodes import ParsedQuery
+from .ast_nodes import ParsedQuery, InsertQuery, OperationType
 
 
 class SQLParserEngine:
@@ -24,8 +26,37 @@ class SQLParserEngine:
         )
         self.query_history = []
 
-    def execute_sql(self, sql_text: str, validate: bool = True) -> Dict[str, Any]:
-        """Ejecuta una o múltiples consultas SQL separadas por punto y coma"""
+        # Caché LRU de ASTs: (sql, schema_version) -> ParsedQuery
+        self.parse_cache_size = 256
+        self._parse_cache: "OrderedDict[Tuple[str, int], ParsedQuery]" = OrderedDict()
+        # Se incrementa con cada CREATE exitoso e invalida los ASTs cacheados
+        self.schema_version = 0
+        # Claves (sql, schema_version) que ya pasaron la validación semántica:
+        # la validación solo depende del AST y del esquema, no se repite
+        self._validated: Set[Tuple[str, int]] = set()
+
+    def parse_cached(self, sql_text: str) -> ParsedQuery:
+        """Parsea usando la caché LRU; lanza ParseError igual que el parser"""
+        key = (sql_text.strip(), self.schema_version)
+        parsed = self._parse_cache.get(key)
+        if parsed is not None:
+            self._parse_cache.move_to_end(key)
+            return parsed
+
+        parsed = self.parser.parse(sql_text)
+        self._parse_cache[key] = parsed
+        if len(self._parse_cache) > self.parse_cache_size:
+            self._parse_cache.popitem(last=False)
+        return parsed
+
+    def execute_sql(
+        self, sql_text: str, validate: bool = True, measure: bool = True
+    ) -> Dict[str, Any]:
+        """Ejecuta una o múltiples consultas SQL separadas por punto y coma.
+
+        Con ``measure=False`` no se toma el tiempo y ``execution_time_ms``
+        queda en 0 (para llamadores que miden por su cuenta).
+        """
         # Normalizar el texto: asegurar que termine con ;
         sql_text = sql_text.strip()
         if not sql_text.endswith(";"):
@@ -36,10 +67,22 @@ class SQLParserEngine:
 
         # Si solo hay una query, ejecutar normalmente
         if len(queries) <= 1:
-            return self._execute_single_query(sql_text, validate)
+            return self._execute_single_query(sql_text, validate, measure)
 
         # Si hay múltiples queries, ejecutar todas y retornar resultado combinado
-        return self._execute_multiple_queries(queries, validate)
+        return self._execute_multiple_queries(queries, validate, measure)
+
+    def execute_many(
+        self, sql_list: List[str], validate: bool = True, measure: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Ejecuta una lista de sentencias ya separadas, en orden.
+
+        Evita normalizar y dividir de nuevo un texto que el llamador ya tiene
+        sentencia por sentencia; devuelve un resultado por sentencia, con el
+        mismo formato que ``execute_sql``.
+        """
+        execute = self._execute_single_query
+        return [execute(sql, validate, measure) for sql in sql_list]
 
     def _split_queries(self, sql_text: str) -> List[str]:
         """Divide el texto SQL en queries individuales (separadas por ;)"""
@@ -68,10 +111,11 @@ class SQLParserEngine:
         return queries
 
     def _execute_single_query(
-        self, sql_text: str, validate: bool = True
+        self, sql_text: str, validate: bool = True, measure: bool = True
     ) -> Dict[str, Any]:
         """Ejecuta una sola consulta SQL"""
-        start_time = time.time()
+        if measure:
+            start_time = time.perf_counter()
 
         result = {
             "success": False,
@@ -82,14 +126,31 @@ class SQLParserEngine:
         }
 
         try:
-            # 1. Parsing
-            parsed_query = self.parser.parse(sql_text)
+            # 1. Parsing (cacheado)
+            key = (sql_text.strip(), self.schema_version)
+            parsed_query = self.parse_cached(sql_text)
             result["parsed_query"] = parsed_query
 
-            # 2. Traducción y ejecución
+            # Los valores de un INSERT terminan en la estructura: no compartir
+            # la lista con el AST cacheado
+            if isinstance(parsed_query, InsertQuery):
+                parsed_query = replace(parsed_query, values=list(parsed_query.values))
+
+            # 2. Traducción y ejecución (sin revalidar una sentencia idéntica)
+            must_validate = validate and key not in self._validated
             execution_result = self.translator.translate_and_execute(
-                parsed_query, validate
+                parsed_query, must_validate
             )
+            if must_validate and execution_result["success"]:
+                if len(self._validated) >= self.parse_cache_size:
+                    self._validated.clear()
+                self._validated.add(key)
+            if execution_result["success"] and parsed_query.operation_type in (
+                OperationType.CREATE_TABLE,
+                OperationType.CREATE_TABLE_FROM_FILE,
+            ):
+                self.schema_version += 1
+                self._validated.clear()
 
             result["success"] = execution_result["success"]
             result["result"] = execution_result["result"]
@@ -109,23 +170,25 @@ class SQLParserEngine:
         except Exception as e:
             result["errors"] = [f"Error inesperado: {str(e)}"]
 
-        result["execution_time_ms"] = (time.time() - start_time) * 1000
+        if measure:
+            result["execution_time_ms"] = (time.perf_counter() - start_time) * 1000
         return result
 
     def _execute_multiple_queries(
-        self, queries: List[str], validate: bool = True
+        self, queries: List[str], validate: bool = True, measure: bool = True
     ) -> Dict[str, Any]:
         """Ejecuta múltiples consultas SQL y retorna resultado combinado"""
-        start_time = time.time()
+        if measure:
+            start_time = time.perf_counter()
 
         all_results = []
         all_errors = []
         last_result = None
         all_success = True
 
-        for i, query in enumerate(queries):
-            query_result = self._execute_single_query(query, validate)
-
+        # Solo se informa el tiempo total: no medir cada sentencia
+        results = self.execute_many(queries, validate, measure=False)
+        for query, query_result in zip(queries, results):
             all_results.append(
                 {
                     "query": query[:50] + "..." if len(query) > 50 else query,
@@ -143,7 +206,7 @@ class SQLParserEngine:
             if query_result["result"] is not None:
                 last_result = query_result["result"]
 
-        total_time = (time.time() - start_time) * 1000
+        total_time = (time.perf_counter() - start_time) * 1000 if measure else 0
 
         return {
             "success": all_success,
@@ -158,7 +221,7 @@ class SQLParserEngine:
     def parse_only(self, sql_text: str) -> Tuple[bool, Any]:
         """Solo parsea sin ejecutar"""
         try:
-            parsed_query = self.parser.parse(sql_text)
+            parsed_query = self.parse_cached(sql_text)
             return True, parsed_query
         except Exception as e:
             return False, str(e)
@@ -166,7 +229,7 @@ class SQLParserEngine:
     def validate_only(self, sql_text: str) -> Tuple[bool, List[str]]:
         """Solo valida sin ejecutar"""
         try:
-            parsed_query = self.parser.parse(sql_text)
+            parsed_query = self.parse_cached(sql_text)
             errors = self.validator.validate_query(parsed_query)
             return len(errors) == 0, errors
         except Exception as e:
@@ -180,6 +243,11 @@ class SQLParserEngine:
         """Lista todas las tablas registradas"""
         return self.translator.list_tables()
 
+    def describe_all(self) -> Dict[str, Dict[str, Any]]:
+        """Información de todas las tablas en una sola llamada (equivale a
+        ``get_table_info`` para cada tabla de ``list_tables``)"""
+        return self.translator.describe_all()
+
     def get_query_history(self, limit: int = 10) -> List[Dict]:
         """Obtiene el historial de consultas"""
         return self.query_history[-limit:]
@@ -192,6 +260,23 @@ class SQLParserEngine:
         """Limpia el historial de consultas"""
         self.query_history.clear()
 
+    def reset(self):
+        """Deja el motor como recién creado sin reconstruir lexer ni parser.
+
+        Olvida los esquemas registrados, las cachés y el historial; si el
+        adaptador tiene ``reset`` (p. ej. ``MockDatabaseAdapter``) también se
+        limpia. ``schema_version`` se incrementa en lugar de volver a 0 para
+        invalidar las cachés externas indexadas por versión.
+        """
+        self.validator.tables.clear()
+        adapter_reset = getattr(self.translator.db_adapter, "reset", None)
+        if adapter_reset is not None:
+            adapter_reset()
+        self._parse_cache.clear()
+        self._validated.clear()
+        self.query_history.clear()
+        self.schema_version += 1
+
 
 def create_sql_parser_engine(database_adapter=None) -> SQLParserEngine:
     """Crea un motor parser SQL completamente configurado"""
@@ -30,7 +30,7 @@ import os
 import sys
 import csv
 import pickle
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Iterable, Sequence, Tuple
 from pathlib import Path
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + "/..")
@@ -380,7 +380,7 @@ class UnifiedDatabaseAdapter:
         indexer = SPIMIIndexer(output_dir=index_dir)
         self.tables[table_name] = indexer
 
-    def add(self, table_name: str, record: List[Any]) -> bool:
+    def add(self, table_name: str, record: List[Any], log: bool = True) -> bool:
         if table_name not in self.tables:
             raise ValueError(f"Tabla '{table_name}' no existe")
         structure_type = self.table_structures[table_name]
@@ -509,7 +509,7 @@ class UnifiedDatabaseAdapter:
             else:
                 success = False
 
-            if success:
+            if success and log:
                 self._log_operation(f"INSERT INTO {table_name} VALUES {record}")
             return success
         except Exception as e:
@@ -520,6 +520,44 @@ class UnifiedDatabaseAdapter:
         for row in rows:
             self.add(table_name, row)
 
+    def bulk_insert(
+        self,
+        table_name: str,
+        rows: Iterable[Sequence[Any]],
+        casters: Optional[Sequence[Callable[[Any], Any]]] = None,
+    ) -> Tuple[int, List[str]]:
+        """Inserta filas (en el orden de las columnas) sin pasar por el parser
+        SQL. ``casters`` convierte cada valor de la fila; un fallo de conversión
+        se reporta como error de esa fila. Retorna (insertadas, errores)."""
+        if table_name not in self.tables:
+            raise ValueError(f"Tabla '{table_name}' no existe")
+        n_columns = len(self.table_schemas[table_name])
+
+        inserted = 0
+        errors = []
+        for row_number, row in enumerate(rows, start=1):
+            if len(row) != n_columns:
+                errors.append(
+                    f"Fila {row_number}: se esperaban {n_columns} valores, se recibieron {len(row)}"
+                )
+                continue
+            try:
+                if casters is None:
+                    record = list(row)
+                else:
+                    record = [cast(value) for cast, value in zip(casters, row)]
+                if self.add(table_name, record, log=False):
+                    inserted += 1
+                else:
+                    errors.append(f"Fila {row_number}: no se pudo insertar (posible duplicado)")
+            except Exception as e:
+                errors.append(f"Fila {row_number}: {e}")
+
+        self._log_operation(
+            f"BULK INSERT INTO {table_name}: {inserted} filas ({len(errors)} errores)"
+        )
+        return inserted, errors
+
     def search(self, table_name: str, column: str, key: Any) -> List[Dict[str, Any]]:
         if table_name not in self.tables:
             raise ValueError(f"Tabla '{table_name}' no existe")
@@ -807,13 +845,22 @@ class UnifiedDatabaseAdapter:
 
     def delete_table(self, table_name: str) -> bool:
         if table_name in self.tables:
-            del self.tables[table_name]
+            table = self.tables.pop(table_name)
+            # Estructuras que mantienen archivos abiertos (B+ Tree)
+            if hasattr(table, "close"):
+                table.close()
             del self.table_structures[table_name]
             del self.table_schemas[table_name]
             self._log_operation(f"DROP TABLE {table_name}")
             return True
         return False
 
+    def close(self) -> None:
+        """Cierra los archivos que las estructuras mantienen abiertos."""
+        for table in self.tables.values():
+            if hasattr(table, "close"):
+                table.close()
+
     def _cast_value(self, value: str, data_type: DataType) -> Any:
         try:
             if data_type == DataType.INT: